@@ -0,0 +1,240 @@
+'''
+Local stand-in of the Looker API used by the benchmarks.
+
+Serves a synthetic instance on /api/4.0/login, /folders, /dashboards and /looks
+(including their /search variants with limit, offset, sorts, deleted, title and name),
+/folders/{id} and /folders/{id}/ancestors and counts the requests and response bytes
+per endpoint.
+
+'''
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PATH = '/api/4.0/'
+
+
+def generate_instance(items, depth=4, breadth=5, looks_ratio=0.5, seed=42):
+    '''
+    Synthetic Looker instance
+    items - int: number of dashboards plus looks
+    depth - int: depth of the folder tree under Shared
+    breadth - int: subfolders of every folder
+    returns dict with folders, dashboards and looks as served by the API
+    '''
+
+    rnd = random.Random(seed)
+
+    folders = [{'id': '1', 'name': 'Shared', 'parent_id': None}]
+    level = [folders[0]]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(breadth):
+                folder = {'id': str(len(folders) + 1), 'name': f'Folder {len(folders) + 1}',
+                          'parent_id': parent['id']}
+                folders.append(folder)
+                next_level.append(folder)
+        level = next_level
+
+    dashboards = []
+    looks = []
+    for item_id in range(1, items + 1):
+        folder = rnd.choice(folders)
+        updated_at = f'2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T00:00:00.000+00:00'
+
+        if rnd.random() < looks_ratio:
+            looks.append({'id': item_id, 'title': f'Look {item_id}', 'public': False,
+                          'folder_id': folder['id'], 'folder': dict(folder), 'updated_at': updated_at})
+        else:
+            dashboards.append({'id': str(item_id), 'title': f'Dashboard {item_id}',
+                               'folder_id': folder['id'], 'folder': dict(folder), 'updated_at': updated_at})
+
+    return {'folders': folders, 'dashboards': dashboards, 'looks': looks}
+
+
+class FakeLooker:
+    '''
+    Threaded HTTP server serving a synthetic instance
+    latency - float: seconds every response is delayed by
+    '''
+
+    def __init__(self, instance, latency=0.0, host='127.0.0.1', port=0):
+        self.instance = instance
+        self.latency = latency
+        self.requests = Counter()
+        self.response_bytes = Counter()
+        self._lock = threading.Lock()
+
+        self._folders = {folder['id']: folder for folder in instance['folders']}
+        self._dashboard_ids = {str(dashboard['id']) for dashboard in instance['dashboards']}
+
+        # presorted orders of the search endpoints
+        self._sorted = {}
+        # (endpoint, attribute) => value => records in id order, for the folder filters
+        self._grouped = {}
+        for endpoint, records in instance.items():
+            self._sorted[(endpoint, 'id')] = records
+            self._sorted[(endpoint, 'updated_at desc')] = sorted(
+                records, key=lambda record: record.get('updated_at') or '', reverse=True)
+            for attribute in ('parent_id', 'folder_id'):
+                grouped = self._grouped[(endpoint, attribute)] = {}
+                for record in records:
+                    grouped.setdefault(str(record.get(attribute)), []).append(record)
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+            self.response_bytes.clear()
+
+    def _count(self, endpoint, size):
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.response_bytes[endpoint] += size
+
+    def _records(self, endpoint, query):
+        if endpoint not in self.instance:
+            return None
+
+        # deleted content is not generated
+        if query.get('deleted') == 'true':
+            return []
+
+        records = self._sorted.get((endpoint, query.get('sorts', 'id')), self.instance[endpoint])
+        for attribute in ('parent_id', 'folder_id'):
+            if attribute in query:
+                records = self._grouped[(endpoint, attribute)].get(query[attribute], [])
+        for attribute in ('title', 'name'):
+            if attribute in query:
+                value = query[attribute].lower()
+                records = [record for record in records if record[attribute].lower() == value]
+        offset = int(query.get('offset', 0))
+        limit = query.get('limit')
+        return records[offset:offset + int(limit)] if limit else records[offset:]
+
+    def _folder(self, path):
+        '''
+        folders/{id} and folders/{id}/ancestors
+        '''
+
+        folder_id, _, relation = path[len('folders/'):].partition('/')
+        folder = self._folders.get(folder_id)
+        if folder is None or relation not in ('', 'ancestors'):
+            return None
+        if not relation:
+            return folder
+
+        ancestors = []
+        while folder['parent_id'] is not None:
+            folder = self._folders[folder['parent_id']]
+            ancestors.insert(0, folder)
+        return ancestors
+
+    def _dashboard_elements(self, path):
+        '''
+        dashboards/{id}/dashboard_elements, generated from the dashboard id
+        Two visualizations, the second one through its result maker, a look and a text tile.
+        Queries are shared by the dashboards, so the same query is returned for several elements.
+        '''
+
+        dashboard_id = path.split('/')[1]
+        if dashboard_id not in self._dashboard_ids:
+            return None
+
+        def query(index):
+            query_id = str((int(dashboard_id) * 7 + index) % 1000 + 1)
+            return {'id': query_id, 'model': f'model_{int(query_id) % 5}', 'view': f'explore_{int(query_id) % 25}',
+                    'fields': [f'explore_{int(query_id) % 25}.count'], 'pivots': None,
+                    'filters': {'explore.created_date': '7 days'}, 'sorts': [], 'limit': '500'}
+
+        element = {'dashboard_id': dashboard_id, 'look_id': None, 'query_id': None, 'query': None,
+                   'result_maker': None, 'look': None}
+        return [
+            dict(element, id=f'{dashboard_id}01', title='Count', type='vis', query_id=query(0)['id'], query=query(0)),
+            dict(element, id=f'{dashboard_id}02', title='Trend', type='vis',
+                 result_maker={'query_id': query(1)['id'], 'query': query(1)}),
+            dict(element, id=f'{dashboard_id}03', title='Saved look', type='vis', look_id=dashboard_id,
+                 look={'query_id': query(2)['id'], 'query': query(2)}),
+            dict(element, id=f'{dashboard_id}04', title='Notes', type='text'),
+        ]
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, endpoint, status, body):
+                payload = json.dumps(body).encode()
+                if fake.latency:
+                    time.sleep(fake.latency)
+                fake._count(endpoint, len(payload))
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if urlparse(self.path).path.rstrip('/') == API_PATH + 'login':
+                    self._send('login', 200, {'access_token': 'token', 'token_type': 'Bearer', 'expires_in': 3600})
+                else:
+                    self._send('unknown', 404, {'message': 'Not found'})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                endpoint = url.path[len(API_PATH):].rstrip('/')
+                if endpoint.startswith('folders/') and not endpoint.endswith('/search'):
+                    folder = fake._folder(endpoint)
+                    if folder is None:
+                        self._send('unknown', 404, {'message': 'Not found'})
+                    else:
+                        self._send('folder', 200, folder)
+                    return
+
+                if endpoint.startswith('dashboards/') and endpoint.endswith('/dashboard_elements'):
+                    elements = fake._dashboard_elements(endpoint)
+                    if elements is None:
+                        self._send('unknown', 404, {'message': 'Not found'})
+                    else:
+                        self._send('dashboard_elements', 200, elements)
+                    return
+
+                if endpoint.endswith('/search'):
+                    endpoint = endpoint[:-len('/search')]
+
+                records = fake._records(endpoint, query)
+                if records is None:
+                    self._send('unknown', 404, {'message': 'Not found'})
+                else:
+                    self._send(endpoint, 200, records)
+
+        return Handler
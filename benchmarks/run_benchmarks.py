@@ -0,0 +1,192 @@
+'''
+Benchmarks of the component hot paths against a local stand-in of the Looker API.
+
+Every run starts the component in its own process on a synthetic instance and
+measures wall time, peak RSS and the requests served by the stand-in.
+
+    python benchmarks/run_benchmarks.py --sizes 1000,10000,100000 --latency 0.01
+    python benchmarks/run_benchmarks.py --scenarios deploy --param import_concurrency=8
+    python benchmarks/run_benchmarks.py --scenarios deploy --targets 3
+    python benchmarks/run_benchmarks.py --scenarios deploy --export-latency 0.01 --param pipelined_deploy=true
+
+'''
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_looker import FakeLooker, generate_instance
+
+BENCHMARKS_PATH = os.path.dirname(os.path.realpath(__file__))
+COMPONENT_PATH = os.path.join(BENCHMARKS_PATH, '..', 'src', 'component.py')
+FAKE_LDEPLOY_PATH = os.path.join(BENCHMARKS_PATH, 'fake_ldeploy')
+
+SCENARIOS = ('fetch_details', 'deploy', 'plan')
+
+
+def folder_paths(folders):
+    by_id = {folder['id']: folder for folder in folders}
+    paths = {}
+    for folder in folders:
+        names = []
+        current = folder
+        while current:
+            names.append(current['name'])
+            current = by_id.get(current['parent_id'])
+        paths[folder['id']] = '/'.join(reversed(names))
+    return paths
+
+
+def environment(base_url):
+    return {'base_url': base_url, 'client_id': 'client', '#client_secret': 'secret'}
+
+
+def build_config(scenario, instance, base_url, deploy_items, extra_params, targets=1):
+
+    from_params = dict(environment(base_url), folder_id='1')
+    to_params = dict(environment(base_url), type='dashboards', value=[], target_folder='Shared/Deployed')
+
+    if scenario == 'deploy':
+        paths = folder_paths(instance['folders'])
+        to_params['value'] = [
+            f'{paths[dashboard["folder"]["id"]]}/{dashboard["title"]}'
+            for dashboard in instance['dashboards'][:deploy_items]
+        ]
+
+    # several targets are deployed from one export
+    if scenario == 'deploy' and targets > 1:
+        to_params = [dict(to_params, name=f'target_{index}') for index in range(1, targets + 1)]
+
+    parameters = {
+        'mode': scenario,
+        'from': from_params,
+        'to': to_params,
+        # the benchmarks run without looker_deployer installed
+        'execution_backend': 'subprocess'
+    }
+    parameters.update(extra_params)
+    return {'parameters': parameters}
+
+
+def prepare_data_folder(data_path, config, instance):
+
+    for folder in ('in/tables', 'in/files', 'out/tables', 'out/files'):
+        os.makedirs(os.path.join(data_path, *folder.split('/')), exist_ok=True)
+
+    with open(os.path.join(data_path, 'config.json'), 'w') as file:
+        json.dump(config, file)
+
+    instance_path = os.path.join(data_path, 'instance.json')
+    with open(instance_path, 'w') as file:
+        json.dump(instance, file)
+
+    bin_path = os.path.join(data_path, 'bin')
+    os.makedirs(bin_path, exist_ok=True)
+    os.symlink(FAKE_LDEPLOY_PATH, os.path.join(bin_path, 'ldeploy'))
+
+    return instance_path, bin_path
+
+
+def run_component(data_path, instance_path, bin_path, ldeploy_latency, export_latency=0.0):
+    '''
+    returns wall time in seconds, peak RSS in MB and the exit code
+    '''
+
+    env = dict(os.environ,
+               KBC_DATADIR=data_path,
+               PATH=f'{bin_path}{os.pathsep}{os.environ.get("PATH", "")}',
+               FAKE_LOOKER_INSTANCE=instance_path,
+               FAKE_LDEPLOY_LATENCY=str(ldeploy_latency),
+               FAKE_LDEPLOY_EXPORT_LATENCY=str(export_latency))
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, COMPONENT_PATH], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = process.stderr.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = rusage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    exit_code = os.waitstatus_to_exitcode(status)
+    if exit_code:
+        sys.stderr.write(stderr.decode()[-2000:])
+
+    return wall_time, peak_rss, exit_code
+
+
+def benchmark(scenario, size, args, extra_params):
+
+    instance = generate_instance(size, depth=args.depth, breadth=args.breadth)
+    fake = FakeLooker(instance, latency=args.latency).start()
+
+    try:
+        config = build_config(scenario, instance, fake.base_url, args.deploy_items, extra_params, args.targets)
+        with tempfile.TemporaryDirectory() as data_path:
+            instance_path, bin_path = prepare_data_folder(data_path, config, instance)
+            wall_time, peak_rss, exit_code = run_component(
+                data_path, instance_path, bin_path, args.ldeploy_latency, args.export_latency)
+    finally:
+        fake.stop()
+
+    return {
+        'scenario': scenario,
+        'items': size,
+        'folders': len(instance['folders']),
+        'wall_time_s': round(wall_time, 3),
+        'peak_rss_mb': round(peak_rss, 1),
+        'requests': sum(fake.requests.values()),
+        'response_mb': round(sum(fake.response_bytes.values()) / 1024 / 1024, 2),
+        'requests_per_endpoint': dict(fake.requests),
+        'exit_code': exit_code
+    }
+
+
+def parse_param(value):
+    key, _, raw = value.partition('=')
+    try:
+        return key, json.loads(raw)
+    except ValueError:
+        return key, raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,5000,50000',
+                        help='comma separated numbers of dashboards plus looks')
+    parser.add_argument('--depth', type=int, default=4, help='depth of the folder tree')
+    parser.add_argument('--breadth', type=int, default=5, help='subfolders of every folder')
+    parser.add_argument('--latency', type=float, default=0.0, help='API response delay in seconds')
+    parser.add_argument('--ldeploy-latency', type=float, default=0.0, help='duration of every ldeploy call')
+    parser.add_argument('--export-latency', type=float, default=0.0, help='export duration per exported item')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='fetch_details, deploy and/or plan')
+    parser.add_argument('--deploy-items', type=int, default=20, help='dashboards deployed in the deploy scenario')
+    parser.add_argument('--targets', type=int, default=1, help='[to] environments in the deploy scenario')
+    parser.add_argument('--param', action='append', default=[], type=parse_param,
+                        help='component parameter as key=json_value, e.g. page_size=500')
+    parser.add_argument('--output', help='write the results into this JSON file')
+    args = parser.parse_args()
+
+    extra_params = dict(args.param)
+    results = []
+    for scenario in args.scenarios.split(','):
+        for size in (int(size) for size in args.sizes.split(',')):
+            result = benchmark(scenario, size, args, extra_params)
+            results.append(result)
+            print(f'{result["scenario"]:<14} items={result["items"]:<8} wall={result["wall_time_s"]:>8.3f}s '
+                  f'rss={result["peak_rss_mb"]:>7.1f}MB requests={result["requests"]:<6} '
+                  f'response={result["response_mb"]:>7.2f}MB exit={result["exit_code"]}', flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if any(result['exit_code'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
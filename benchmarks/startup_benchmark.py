@@ -0,0 +1,89 @@
+'''
+Cold-start latency of the component entry point.
+
+Measures the median wall time of importing the component module and of a run
+failing its validation (nothing but the configuration is read), each in a new
+process, and lists the modules loaded by the import that only some runs need.
+
+    python benchmarks/startup_benchmark.py --runs 20
+    python benchmarks/startup_benchmark.py --max-import-ms 150
+
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_PATH = os.path.dirname(os.path.realpath(__file__))
+SRC_PATH = os.path.join(BENCHMARKS_PATH, '..', 'src')
+COMPONENT_PATH = os.path.join(SRC_PATH, 'component.py')
+
+# loaded on the code paths using them only
+LAZY_MODULES = ('requests', 'looker_session', 'looker_deployer', 'export_cache', 'export_index', 'tarfile',
+                'difflib', 'profiler', 'cProfile', 'tracemalloc')
+
+
+def timed_run(args, env):
+    start = time.perf_counter()
+    process = subprocess.run(args, env=env, capture_output=True, text=True)
+    return time.perf_counter() - start, process
+
+
+def loaded_lazy_modules(env):
+    code = (f'import sys, component; '
+            f'print(" ".join(m for m in {LAZY_MODULES!r} if m in sys.modules))')
+    process = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return process.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='processes started per measurement')
+    parser.add_argument('--max-import-ms', type=float, help='fail when the median import takes longer')
+    parser.add_argument('--output', help='write the results into this JSON file')
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=SRC_PATH)
+
+    with tempfile.TemporaryDirectory() as data_path:
+        # [from] credentials are missing, the run stops in the validation
+        with open(os.path.join(data_path, 'config.json'), 'w') as file:
+            json.dump({'parameters': {
+                'mode': 'fetch_details',
+                'from': {'base_url': '', 'client_id': '', '#client_secret': ''},
+                'to': {'base_url': '', 'client_id': '', '#client_secret': ''}
+            }}, file)
+        run_env = dict(env, KBC_DATADIR=data_path)
+
+        # the first start compiles the bytecode
+        timed_run([sys.executable, '-c', 'import component'], env)
+
+        import_times = [timed_run([sys.executable, '-c', 'import component'], env)[0] for _ in range(args.runs)]
+        validation_times = [timed_run([sys.executable, COMPONENT_PATH], run_env)[0] for _ in range(args.runs)]
+        interpreter_times = [timed_run([sys.executable, '-c', 'pass'], env)[0] for _ in range(args.runs)]
+
+    result = {
+        'interpreter_ms': round(statistics.median(interpreter_times) * 1000, 1),
+        'import_ms': round(statistics.median(import_times) * 1000, 1),
+        'validation_failure_ms': round(statistics.median(validation_times) * 1000, 1),
+        'lazy_modules_loaded': loaded_lazy_modules(env)
+    }
+
+    print(f'interpreter={result["interpreter_ms"]}ms import={result["import_ms"]}ms '
+          f'validation_failure={result["validation_failure_ms"]}ms '
+          f'lazy_modules_loaded={",".join(result["lazy_modules_loaded"]) or "none"}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+
+    if result['lazy_modules_loaded'] or (args.max_import_ms and result['import_ms'] > args.max_import_ms):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
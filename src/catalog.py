@@ -0,0 +1,101 @@
+'''
+Compact catalog of the dashboards and looks of a Looker environment.
+
+'''
+import sys
+
+
+class ContentEntry:
+    '''
+    One dashboard or look, folder ids and paths are shared with the other entries
+    '''
+
+    __slots__ = ('id', 'title', 'folder_id', 'folder_path', 'updated_at')
+
+    def __init__(self, id, title, folder_id, folder_path, updated_at=None):
+        self.id = id
+        self.title = title
+        self.folder_id = folder_id
+        self.folder_path = folder_path
+        self.updated_at = updated_at
+
+    @property
+    def ui_path(self):
+        return f'{self.folder_path}/{self.title}'
+
+
+class ContentCatalog:
+    '''
+    Dashboards or looks keyed by their ui_path
+    An ui_path normally holds one entry, a list only when several entries share it.
+    '''
+
+    def __init__(self, prefix):
+        # Dashboard/Look, prefix of the exported file names
+        self.prefix = prefix
+        self._entries = {}
+        self._strings = {}
+
+    def __contains__(self, ui_path):
+        return ui_path in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, id, title, folder_id, folder_path, updated_at=None):
+        '''
+        returns the added entry
+        '''
+
+        entry = ContentEntry(id, title, self._shared(folder_id), sys.intern(folder_path), updated_at)
+        ui_path = entry.ui_path
+
+        current = self._entries.get(ui_path)
+        if current is None:
+            self._entries[ui_path] = entry
+        elif isinstance(current, list):
+            current.append(entry)
+        else:
+            self._entries[ui_path] = [current, entry]
+
+        return entry
+
+    def entries(self, ui_path):
+        '''
+        All entries with the ui_path, in the order they were added
+        '''
+
+        current = self._entries.get(ui_path)
+        if current is None:
+            return []
+        return current if isinstance(current, list) else [current]
+
+    def entry(self, ui_path):
+        '''
+        Entry deployed for the ui_path, the last one added when several share it, None if there is none
+        '''
+
+        entries = self.entries(ui_path)
+        return entries[-1] if entries else None
+
+    def file_name(self, entry):
+        return f'{self.prefix}_{entry.id}_{entry.title}.json'
+
+    def full_path(self, ui_path):
+        '''
+        Path of the exported file of the entry deployed for the ui_path, None if there is none
+        '''
+
+        entry = self.entry(ui_path)
+        if entry is None:
+            return None
+        return f'{entry.folder_path}/{self.file_name(entry)}'
+
+    def _shared(self, value):
+        # folder ids repeat in every entry of the folder, each is stored once
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
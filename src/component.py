@@ -4,19 +4,25 @@ Template Component main class.
 '''
 import logging
 import os
-import subprocess
 from pathlib import Path
 import csv
 import sys
+import hashlib
 import json
-import requests
-from urllib.request import pathname2url  # noqa
-import urllib.parse
-import pandas as pd
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
 
 from keboola.component import CommonInterface
 
+from catalog import ContentCatalog
+from deployer_backend import BACKEND_SUBPROCESS, DeployCommandError, create_backend
+from folder_index import FolderPathIndex
+from response_cache import ResponseCache
+from run_metrics import METRICS_COLUMNS, METRICS_PRIMARY_KEY, RunMetrics
+from table_writer import TableWriter
+
 # configuration variables
 
 # #### Keep for debug
@@ -27,6 +33,27 @@ KEY_TO = 'to'
 KEY_BASE_URL = 'base_url'
 KEY_CLIENT_ID = 'client_id'
 KEY_CLIENT_SECRET = '#client_secret'
+KEY_PAGE_SIZE = 'page_size'
+KEY_IMPORT_CONCURRENCY = 'import_concurrency'
+KEY_EXECUTION_BACKEND = 'execution_backend'
+KEY_EXPORT_MODE = 'export_mode'
+KEY_SKIP_UNCHANGED = 'skip_unchanged'
+KEY_INCREMENTAL_FETCH = 'incremental_fetch'
+KEY_CACHE_TTL = 'cache_ttl'
+KEY_TARGET_NAME = 'name'
+KEY_EXPORT_CONCURRENCY = 'export_concurrency'
+KEY_EXPORT_CACHE = 'export_cache'
+KEY_PIPELINED_DEPLOY = 'pipelined_deploy'
+KEY_DASHBOARD_ELEMENTS = 'fetch_dashboard_elements'
+KEY_ELEMENT_CONCURRENCY = 'element_concurrency'
+
+# state keys
+STATE_DEPLOYED_HASHES = 'deployed_hashes'
+STATE_FETCH_WATERMARKS = 'fetch_watermarks'
+STATE_FOLDER_PATHS = 'folder_paths'
+# hex digits of the folder path hashes kept in the state
+PATH_HASH_LENGTH = 12
+STATE_EXPORT_CACHE = 'export_cache'
 KEY_CREDENTIALS = [
     KEY_BASE_URL,
     KEY_CLIENT_ID,
@@ -41,10 +68,68 @@ REQUIRED_PARAMETERS = [
 ]
 REQUIRED_IMAGE_PARS = []
 
-CURRENT_DATE = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+# date column of the log, every row is stamped when it is created
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 APP_VERSION = '0.0.6'
 
+# number of records requested per page, 0 disables paging
+DEFAULT_PAGE_SIZE = 1000
+
+# folders, dashboards and looks of both environments are fetched at once
+FETCH_WORKERS = 6
+
+# connections kept alive per environment
+POOL_SIZE = FETCH_WORKERS
+
+EXPORT_MODE_FULL = 'full'
+EXPORT_MODE_TARGETED = 'targeted'
+
+# imports running at once during deploy
+DEFAULT_IMPORT_CONCURRENCY = 4
+DEFAULT_EXPORT_CONCURRENCY = 4
+
+# dashboards whose elements are requested at once
+DEFAULT_ELEMENT_CONCURRENCY = 8
+
+# bytes read at once when hashing exported content
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# characters of the import stderr kept in the log table
+MAX_ISSUE_LENGTH = 1000
+
+# attributes requested from the API, only the ones used in the output
+FOLDER_FIELDS = 'id,name,parent_id'
+DASHBOARD_FIELDS = 'id,title,updated_at,folder(id,name,parent_id)'
+LOOK_FIELDS = 'id,title,public,updated_at,folder_id,folder(id,name,parent_id)'
+QUERY_FIELDS = 'id,model,view,fields,pivots,filters,sorts,limit'
+# the query of an element is its own, the one of its result maker or the one of its look
+ELEMENT_FIELDS = (f'id,dashboard_id,title,type,look_id,query_id,query({QUERY_FIELDS}),'
+                  f'result_maker(query_id,query({QUERY_FIELDS})),look(query_id,query({QUERY_FIELDS}))')
+
+# output files of the profiled runs
+PROFILE_TAG = 'looker_deployer_profile'
+
+# compared to tell whether an exported folder changed
+FINGERPRINT_FIELDS = 'id,folder_id,updated_at'
+# exported trees with more folders are fingerprinted from the listings of the whole instance
+FINGERPRINT_FOLDER_LIMIT = 100
+
+# output table columns
+FOLDER_COLUMNS = ['environemnt', 'id', 'name', 'parent_id', 'full_path']
+DASHBOARD_COLUMNS = ['environment', 'dashboard_id', 'title', 'space', 'folder', 'full_name', 'full_path', 'ui_path']
+LOOK_COLUMNS = ['url', 'id', 'title', 'public', 'folder', 'folder_id', 'full_name', 'full_path', 'ui_path']
+# added to dashboards and looks in incremental fetch
+INCREMENTAL_COLUMNS = ['updated_at', 'deleted']
+LOG_COLUMNS = ['date', 'type', 'value', 'status', 'issue']
+LOG_PRIMARY_KEY = ['date', 'type', 'value']
+# a list of [to] environments logs into its own table, keyed by the target too
+TARGET_LOG_COLUMNS = ['date', 'target', 'type', 'value', 'status', 'issue']
+TARGET_LOG_PRIMARY_KEY = ['date', 'target', 'type', 'value']
+ELEMENT_COLUMNS = ['environment', 'id', 'dashboard_id', 'title', 'type', 'look_id', 'query_id']
+QUERY_COLUMNS = ['environment', 'id', 'model', 'view', 'fields', 'pivots', 'filters', 'sorts', 'limit']
+PLAN_COLUMNS = ['type', 'ui_path', 'status', 'from_id', 'to_id', 'from_updated_at', 'to_updated_at', 'collision']
+
 
 def get_local_data_path():
     return Path(__file__).resolve().parent.parent.joinpath('data').as_posix()
@@ -75,6 +160,34 @@ class Component(CommonInterface):
         if self.configuration.parameters.get(KEY_DEBUG):
             self.set_debug_mode()
 
+        # one authorized session per environment for the whole run
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+        self.state = {}
+        self._state_lock = threading.Lock()
+
+        # listings are requested only once per run, or once per cache_ttl seconds across runs
+        self.response_cache = ResponseCache(
+            cache_path=os.path.join(self.data_folder_path, 'cache'),
+            ttl=self.configuration.parameters.get(KEY_CACHE_TTL) or 0)
+
+        # debug runs are profiled, the results are written into the output files
+        self.profiler = None
+        if self.configuration.parameters.get(KEY_DEBUG):
+            from profiler import RunProfiler
+            self.profiler = RunProfiler()
+
+        self.metrics = RunMetrics(
+            run_id=os.environ.get('KBC_RUNID') or datetime.now().strftime('%Y%m%d%H%M%S'),
+            on_phase_end=self.profiler.phase_finished if self.profiler else None)
+        # [from] folders requested by the validation, folder id => record
+        self.from_folders = {}
+        # folders renamed or moved since the previous incremental fetch of each environment
+        self.moved_folders = {}
+        self.incremental_fetch = False
+        self.fetch_elements = False
+
     @staticmethod
     def set_debug_mode():
         logging.getLogger().setLevel(logging.DEBUG)
@@ -85,46 +198,73 @@ class Component(CommonInterface):
         '''
         Main execution code
         '''
-        params = self.configuration.parameters
+        if self.profiler:
+            self.profiler.start()
+
+        try:
+            params = self.configuration.parameters
 
-        # Validate user parameters
-        self.validate_user_params(params)
+            # Validate user parameters
+            self.validate_user_params(params)
 
-        # FROM Parameters
-        from_params = params.get(KEY_FROM)
+            # FROM Parameters
+            from_params = params.get(KEY_FROM)
 
-        # TO Parameters
-        to_params = params.get(KEY_TO)
+            # TO Parameters, deploy may have several targets
+            targets = self.get_targets(params)
+            to_params = targets[0][1]
 
-        # Application mode
-        mode = params.get(KEY_MODE)
-        logging.info(f'Mode: [{mode}]')
+            # Application mode
+            mode = params.get(KEY_MODE)
+            logging.info(f'Mode: [{mode}]')
 
-        # caching dashboard details for deployment
-        # there had been issues where new dashboards have misaligned ids
-        self.all_dashboards = {
-            'from': {},
-            'to': {}
-        }
+            # state of the previous runs, written back at the end of the run
+            self.state = self.get_state_file()
 
-        # caching looks details for deployment
-        self.all_looks = {
-            'from': {},
-            'to': {}
-        }
+            # plan needs the complete catalogs of both environments
+            self.incremental_fetch = bool(params.get(KEY_INCREMENTAL_FETCH)) and mode == 'fetch_details'
+            if params.get(KEY_INCREMENTAL_FETCH) and not self.incremental_fetch:
+                logging.warning('Incremental fetch is available only in [fetch_details] mode, fetching everything.')
 
-        # Details for FROM
-        if from_params['base_url']:
-            self.fetch_details(from_params, 'from')
+            self.fetch_elements = bool(params.get(KEY_DASHBOARD_ELEMENTS)) and mode == 'fetch_details'
+            if params.get(KEY_DASHBOARD_ELEMENTS) and not self.fetch_elements:
+                logging.warning('Dashboard elements are fetched only in [fetch_details] mode, skipping them.')
 
-        # Details for TO
-        if to_params['base_url']:
-            self.fetch_details(to_params, 'to')
+            # dashboards and looks of each environment keyed by their ui_path, for deploy and plan
+            # there had been issues where new dashboards have misaligned ids
+            self.catalogs = {
+                input_type: {'dashboards': ContentCatalog('Dashboard'), 'looks': ContentCatalog('Look')}
+                for input_type in ('from', 'to')
+            }
+
+            # folder path index of each environment
+            self.folder_indexes = {}
 
-        if mode == 'deploy':
-            self.deploy(from_params=from_params, to_params=to_params)
+            if mode == 'deploy':
+                # only the configured values are looked up, the catalogs are not fetched
+                content_type, values = self.deploy_content(targets)
+                self.resolve_deploy_content(from_params, content_type, values)
+                self.deploy(from_params=from_params, targets=targets)
 
-        logging.info('Looker Deployer finished.')
+            else:
+                # Details for FROM and TO
+                environments = [
+                    (env_params, input_type)
+                    for env_params, input_type in ((from_params, 'from'), (to_params, 'to'))
+                    if env_params['base_url']
+                ]
+                self.fetch_all_details(environments)
+
+                if mode == 'plan':
+                    self.plan()
+
+            self.close_sessions()
+            self.write_state_file(self.state)
+            logging.info('Looker Deployer finished.')
+        finally:
+            if self.profiler:
+                self.write_profile()
+            self.write_metrics()
 
     def validate_user_params(self, params):
         '''
@@ -147,70 +287,75 @@ class Component(CommonInterface):
                 sys.exit(1)
 
             # 3 - Ensure folder id is specified
-            if from_params['folder_id'] == '':
+            if not self.from_folder_ids(from_params):
                 logging.error('Please specify your [from] folder id.')
                 sys.exit(1)
 
-            # 4 - Ensure TO credentials are entered
-            to_params = params.get(KEY_TO)
-            if to_params[KEY_BASE_URL] == '' or not to_params[KEY_CLIENT_ID] or not to_params[KEY_CLIENT_SECRET]:
-                logging.error('[TO] credentials are missing.')
-                sys.exit(1)
+            targets = self.get_targets(params)
+            for section, to_params in targets:
+                target = f'[TO] {self.target_name(to_params)}' if len(targets) > 1 else '[TO]'
 
-            # 5 - check desginated type
-            if to_params['type'] not in ('folders', 'dashboards', 'looks'):
-                logging.error(f'Invalid [Export Type]: {to_params["type"]}')
-                sys.exit(1)
+                # 4 - Ensure TO credentials are entered
+                if to_params[KEY_BASE_URL] == '' or not to_params[KEY_CLIENT_ID] or not to_params[KEY_CLIENT_SECRET]:
+                    logging.error(f'{target} credentials are missing.')
+                    sys.exit(1)
 
-            # 6 - make sure there are at least 1 TO path
-            if len(to_params['value']) < 1:
-                logging.error(
-                    'Please specify what you want to export in [TO].')
+                # 5 - check desginated type
+                if to_params['type'] not in ('folders', 'dashboards', 'looks'):
+                    logging.error(f'Invalid [Export Type]: {to_params["type"]}')
+                    sys.exit(1)
+
+                # 6 - make sure there are at least 1 TO path
+                if len(to_params['value']) < 1:
+                    logging.error(
+                        f'Please specify what you want to export in {target}.')
+                    sys.exit(1)
+
+                # 7 - making sure the target folder is configured in the TO environemnt
+                if to_params['target_folder'] == '':
+                    logging.error(
+                        f'Please configure your [Target Folder] in your {target} environment.')
+                    sys.exit(1)
+
+            # all targets are deployed from one export
+            if len({to_params['type'] for _, to_params in targets}) > 1:
+                logging.error('All [TO] targets have to deploy the same [Export Type].')
                 sys.exit(1)
 
-            # 7 - making sure the target folder is configured in the TO environemnt
-            if to_params['target_folder'] == '':
-                logging.error(
-                    'Please configure your [Target Folder] in your [TO] environment.')
+            if len({self.target_name(to_params) for _, to_params in targets}) < len(targets):
+                logging.error('[TO] targets have to be unique, set their [name] to tell them apart.')
                 sys.exit(1)
 
             # 8 - testing connection with FROM credentials
             logging.info('Checking [FROM] credentials')
-            from_url = from_params.get(KEY_BASE_URL)
-            from_request_url = urllib.parse.urljoin(from_url, '/api/4.0')
-            from_client_id = from_params.get(KEY_CLIENT_ID)
-            from_client_secret = from_params.get(KEY_CLIENT_SECRET)
-            from_token = self.authorize(
-                url=from_request_url, client_id=from_client_id, client_secret=from_client_secret)
+            self.authorize(from_params, 'from')
 
             # 9 - testing connection with TO credentials
-            logging.info('Checking [TO] credentials')
-            to_url = to_params.get(KEY_BASE_URL)
-            to_request_url = urllib.parse.urljoin(to_url, '/api/4.0')
-            to_client_id = to_params.get(KEY_CLIENT_ID)
-            to_client_secret = to_params.get(KEY_CLIENT_SECRET)
-            self.authorize(url=to_request_url, client_id=to_client_id,
-                           client_secret=to_client_secret)
-
-            # 10 - ensure the input folder_id is valid when mode is deploy
+            for section, to_params in targets:
+                logging.info(f'Checking [TO] credentials of [{self.target_name(to_params)}]')
+                self.authorize(to_params, section)
+
+            # 10 - ensure the input folder_ids are valid when mode is deploy
             mode = params.get(KEY_MODE)
             if mode == 'deploy':
-                from_folders, from_folder_hierarchy = self.get_folder_details(
-                    from_url, from_token)
-                try:
-                    from_folder_id = int(from_params.get('folder_id'))
-                except Exception:
-                    logging.error(f'{from_folder_id} is not a valid id.')
-                    sys.exit(1)
-                if str(from_folder_id) not in list(from_folder_hierarchy.keys()):
-                    logging.error(
-                        f'[{from_folder_id}] from [FROM] is not one of the available folder ids.')
-                    sys.exit(1)
+                for folder_id in self.from_folder_ids(from_params):
+                    try:
+                        from_folder_id = int(folder_id)
+                    except Exception:
+                        logging.error(f'{folder_id} is not a valid id.')
+                        sys.exit(1)
+                    self.from_folders[folder_id] = self.get_from_folder(from_params, from_folder_id)
+
+        elif len(self.get_targets(params)) > 1:
+
+            logging.error('Several [TO] targets are supported only in [deploy] mode.')
+            sys.exit(1)
 
         elif params['mode'] == 'fetch_details':
 
             # 11 - ensure one of FROM or TO credentials are entered
-            if params['from']['base_url'] == '' and params['to']['base_url'] == '':
+            to_params = self.get_targets(params)[0][1]
+            if params['from']['base_url'] == '' and to_params['base_url'] == '':
                 logging.error(
                     'Please configure either [FROM] or [TO] credentials for [fetch_details]')
                 sys.exit(1)
@@ -219,72 +364,159 @@ class Component(CommonInterface):
             from_params = params.get(KEY_FROM)
             if params['from']['base_url']:
                 logging.info('Checking [FROM] credentials')
-                from_url = from_params.get(KEY_BASE_URL)
-                from_request_url = urllib.parse.urljoin(from_url, '/api/4.0')
-                from_client_id = from_params.get(KEY_CLIENT_ID)
-                from_client_secret = from_params.get(KEY_CLIENT_SECRET)
-                from_token = self.authorize(
-                    url=from_request_url, client_id=from_client_id, client_secret=from_client_secret)
+                self.authorize(from_params, 'from')
 
             # 13 - check TO credentials if configured
-            to_params = params.get(KEY_TO)
-            if params['to']['base_url']:
+            if to_params['base_url']:
                 logging.info('Checking [TO] credentials')
-                to_url = to_params.get(KEY_BASE_URL)
-                to_request_url = urllib.parse.urljoin(to_url, '/api/4.0')
-                to_client_id = to_params.get(KEY_CLIENT_ID)
-                to_client_secret = to_params.get(KEY_CLIENT_SECRET)
-                self.authorize(url=to_request_url, client_id=to_client_id,
-                               client_secret=to_client_secret)
+                self.authorize(to_params, 'to')
+
+        elif params['mode'] == 'plan':
+
+            # 14 - both environments are compared
+            environments = ((params.get(KEY_FROM), 'from'), (self.get_targets(params)[0][1], 'to'))
+            for env_params, input_type in environments:
+                if not env_params[KEY_BASE_URL] or not env_params[KEY_CLIENT_ID] or not env_params[KEY_CLIENT_SECRET]:
+                    logging.error(f'[{input_type.upper()}] credentials are missing.')
+                    sys.exit(1)
+
+                logging.info(f'Checking [{input_type.upper()}] credentials')
+                self.authorize(env_params, input_type)
 
         else:
 
             logging.error(
-                'Invalid mode. Please select either [deploy] or [fetch_details]')
+                'Invalid mode. Please select either [deploy], [fetch_details] or [plan]')
             sys.exit(1)
 
-    def post_request(self, url, header, body=None):
+    @staticmethod
+    def from_folder_ids(from_params):
         '''
-        Standard Post request
+        Ids of the [from] folders, folder_id is either one id, a comma separated list or a list
         '''
 
-        r = requests.post(url=url, headers=header, data=body)
+        folder_ids = from_params.get('folder_id')
+        if not isinstance(folder_ids, list):
+            folder_ids = str(folder_ids if folder_ids is not None else '').split(',')
 
-        return r
+        return list(dict.fromkeys(str(folder_id).strip() for folder_id in folder_ids if str(folder_id).strip()))
 
-    def authorize(self, url, client_id, client_secret):
+    def get_from_folder(self, from_params, folder_id):
         '''
-        Authorizing Looker account with client id and secret
+        Record of the configured [from] folder
+        Only a missing folder is reported as a wrong id, other failures with their response.
         '''
 
-        auth_url = urllib.parse.urljoin(url, '/api/4.0/login')
-        auth_header = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-        }
-        auth_body = 'client_id={}&client_secret={}'.format(
-            client_id, client_secret)
-        request_url = auth_url + '?' + auth_body
-
-        res = self.post_request(request_url, auth_header)
+        session = self.get_session(from_params, 'from')
+        endpoint = f'folders/{folder_id}'
+        with self.metrics.phase('get_folder', 'from'):
+            res = session.get(endpoint, params={'fields': FOLDER_FIELDS})
 
+        if res.status_code == 404:
+            logging.error(f'[{folder_id}] from [FROM] is not one of the available folder ids.')
+            sys.exit(1)
         if res.status_code != 200:
-            logging.error(
-                "Authorization failed. Please check your credentials.")
+            logging.error(f'Request to [{session.url(endpoint)}] failed: {res.status_code} - {res.text}')
             sys.exit(1)
 
-        return res.json()['access_token']
+        return res.json()
+
+    @staticmethod
+    def get_targets(params):
+        '''
+        [to] environments as (looker.ini section, params) pairs
+        [to] is either one environment or a list of them
+        '''
+
+        to_params = params.get(KEY_TO)
+        if isinstance(to_params, dict):
+            return [('to', to_params)]
+        if len(to_params) == 1:
+            return [('to', to_params[0])]
+
+        return [(f'to_{index}', target) for index, target in enumerate(to_params, start=1)]
+
+    @staticmethod
+    def log_table(to_params):
+        '''
+        Name, columns and primary key of the deploy log
+        A single [to] object keeps the log table of the previous versions.
+        '''
+
+        if isinstance(to_params, list):
+            return 'target_log.csv', TARGET_LOG_COLUMNS, TARGET_LOG_PRIMARY_KEY
+        return 'log.csv', LOG_COLUMNS, LOG_PRIMARY_KEY
+
+    @staticmethod
+    def target_name(to_params):
+        '''
+        Name of the [to] environment in the log, its base url unless named
+        '''
+
+        return to_params.get(KEY_TARGET_NAME) or to_params[KEY_BASE_URL]
+
+    @staticmethod
+    def deploy_content(targets):
+        '''
+        Type and values deployed into any of the targets, exported at once
+        '''
+
+        values = list(dict.fromkeys(val for _, to_params in targets for val in to_params['value']))
+        return targets[0][1]['type'], values
+
+    def get_session(self, params, input_type):
+        '''
+        Session of the environment, shared by validation, fetching and deploy
+        input_type - str: FROM/TO environment
+        '''
+
+        # requests is loaded only by the runs calling the API
+        from looker_session import LookerSession
+
+        with self._sessions_lock:
+            if input_type not in self._sessions:
+                self._sessions[input_type] = LookerSession(
+                    base_url=params.get(KEY_BASE_URL),
+                    client_id=params.get(KEY_CLIENT_ID),
+                    client_secret=params.get(KEY_CLIENT_SECRET),
+                    pool_size=max(POOL_SIZE, self.element_concurrency),
+                    on_response=self.metrics.record_response)
+
+            return self._sessions[input_type]
 
-    def create_looker_ini(self, from_params, to_params):
+    def close_sessions(self):
+
+        for session in self._sessions.values():
+            session.close()
+        self._sessions = {}
+
+    def authorize(self, params, input_type):
+        '''
+        Authorizing Looker account with client id and secret
+        '''
+        from looker_session import LookerAuthorizationError
+
+        try:
+            with self.metrics.phase('authorize', input_type):
+                return self.get_session(params, input_type).get_token()
+        except LookerAuthorizationError as err:
+            logging.error(
+                f"{err}. Please check your credentials.")
+            sys.exit(1)
+
+    def create_looker_ini(self, from_params, targets):
 
         logging.info('Creating Looker configuration...')
-        with open('/data/looker.ini', 'w', newline='') as file:
+        with open(self.looker_ini_path, 'w', newline='') as file:
             writer = csv.writer(file)
 
             self.write_looker_ini(
                 writer_obj=writer, creds_type='from', creds_obj=from_params)
 
-            self.write_looker_ini(
-                writer_obj=writer, creds_type='to', creds_obj=to_params)
+            # one section per target
+            for section, to_params in targets:
+                self.write_looker_ini(
+                    writer_obj=writer, creds_type=section, creds_obj=to_params)
 
     def write_looker_ini(self, writer_obj, creds_type, creds_obj):
 
@@ -297,24 +529,47 @@ class Component(CommonInterface):
         writer_obj.writerow(['verify_ssl=True'])
         writer_obj.writerow([])
 
+    @property
+    def exports_path(self):
+        # trailing separator is expected by ldeploy --local-target
+        return os.path.join(self.data_folder_path, 'exports', '')
+
+    @property
+    def looker_ini_path(self):
+        return os.path.join(self.data_folder_path, 'looker.ini')
+
+    def export_folder_path(self, folder_id):
+        '''
+        Folders are exported each into its own directory, so concurrent exports do not clash
+        '''
+
+        return os.path.join(self.exports_path, str(folder_id), '')
+
+    def export_file_path(self, relative_path):
+        '''
+        Path of exported content, relative_path as in the full_path column
+        '''
+
+        return self.export_index.file_path(relative_path)
+
     def construct_arg(self, arg_type, **kwargs):
-        export_path = '/data/exports/'
-        looker_creds = ['--ini', '/data/looker.ini']
+        export_path = kwargs.get('local_target', self.exports_path)
+        looker_creds = ['--ini', self.looker_ini_path]
         arg = ['ldeploy', 'content', f'{arg_type}'] + looker_creds
 
         if arg_type == 'export':
             env = ['--env', 'from']
-            folder = ['--folders', f'{kwargs["folder_id"]}']
+            folder_ids = kwargs['folder_id'] if isinstance(kwargs['folder_id'], list) else [kwargs['folder_id']]
+            folder = ['--folders'] + [f'{folder_id}' for folder_id in folder_ids]
             # arg = f'{arg} {env} {folder} --local-target {export_path}'
             arg = arg + env + folder + ['--local-target', f'{export_path}']
 
         elif arg_type == 'import':
-            env = ['--env', 'to']
+            env = ['--env', kwargs.get('env', 'to')]
             import_filename = kwargs['value']
 
             # dashboard/looks to export
-            file_path = '/' + os.path.join(
-                *export_path.split('/'), *import_filename.split('/'))
+            file_path = self.export_file_path(import_filename)
             # dest = [f'--{kwargs["type"]}', f'{export_path}{import_filename}']
             dest = [f'--{kwargs["type"]}', file_path]
 
@@ -329,97 +584,699 @@ class Component(CommonInterface):
 
         return arg
 
-    def deploy(self, from_params, to_params):
+    def deploy(self, from_params, targets):
+        '''
+        Exporting the content once and importing it into all targets at once
+        targets - list: (looker.ini section, params) of each [to] environment
+        '''
+        # loaded only by deploy runs
+        from export_index import ExportIndex
 
         # Create looker configuration
-        self.create_looker_ini(from_params, to_params)
+        self.create_looker_ini(from_params, targets)
+
+        self.backend = create_backend(self.configuration.parameters.get(
+            KEY_EXECUTION_BACKEND, BACKEND_SUBPROCESS))
+        logging.info(f'Running looker_deployer [{self.backend.name}]')
 
         # 1 - Exporting Content
-        export_statement = self.construct_arg(
-            arg_type='export', folder_id=from_params['folder_id'])
+        content_type, values = self.deploy_content(targets)
+        # pipelined imports start once the folders of their values are exported, the folders are exported
+        # in the order of the values
+        pipelined = bool(self.configuration.parameters.get(KEY_PIPELINED_DEPLOY))
+        export_folders = self.get_export_folders(from_params, content_type, values, targeted=pipelined)
+        if pipelined:
+            order = {}
+            for index, val in enumerate(values):
+                order.setdefault(self.value_export_folder(content_type, val, export_folders), index)
+            export_folders.sort(key=lambda folder_id: order.get(folder_id, len(values)))
         logging.info(
-            f'Exporting data from folder [{from_params["folder_id"]}]')
+            f'Exporting data from folders {export_folders}')
+
+        # folders not changed since their last export are restored from its archive
+        export_cache = self.configuration.parameters.get(KEY_EXPORT_CACHE)
+        fingerprints = self.export_fingerprints(from_params, export_folders) if export_cache else {}
+        exported_folders = [
+            folder_id for folder_id in export_folders
+            if not (export_cache and self.restore_export(from_params, folder_id, fingerprints[folder_id]))
+        ]
+
+        # exported files are listed once per export and merged into one index, imports look them up
+        self.export_index = ExportIndex()
+        # folder id => export of the folder, done once it is indexed
+        self.exports = {}
+
+        concurrency = max(1, int(self.configuration.parameters.get(
+            KEY_EXPORT_CONCURRENCY, DEFAULT_EXPORT_CONCURRENCY)))
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(exported_folders)))) as executor:
+            for folder_id in export_folders:
+                if folder_id in exported_folders:
+                    self.exports[folder_id] = executor.submit(
+                        self.export_folder, folder_id, from_params, fingerprints.get(folder_id))
+                else:
+                    self.exports[folder_id] = Future()
+                    self.index_export(folder_id)
+                    self.exports[folder_id].set_result(None)
+
+            if not pipelined:
+                # all exports finish before the first import
+                for future in self.exports.values():
+                    try:
+                        future.result()
+                    except DeployCommandError as err:
+                        logging.error(err)
+                        sys.exit(1)
+
+            # 2 - Importing Content, every target has its own pool of imports
+            with ThreadPoolExecutor(max_workers=len(targets)) as import_executor:
+                logs = [import_executor.submit(self.import_content, to_params, section)
+                        for section, to_params in targets]
+                logs = [row for future in logs for row in future.result()]
 
-        try:
-            logging.debug(f"Running export statement: {export_statement}")
-            subprocess.run(export_statement, check=True)
+        # Output log of the run
+        filename, columns, primary_key = self.log_table(self.configuration.parameters.get(KEY_TO))
+        self._output(logs, filename, columns, primary_key=primary_key)
 
-        except Exception as err:
-            logging.error(err)
+        failed_exports = [folder_id for folder_id, future in self.exports.items() if future.exception()]
+        if failed_exports:
+            logging.error(f'Export of folders {failed_exports} failed.')
             sys.exit(1)
 
-        # with open("/data/exports/all_dashboards.json", 'w') as file:
-        #     json.dump(self.all_dashboards, file)
+    def export_folder(self, folder_id, from_params=None, fingerprint=None):
+        '''
+        Exporting one [from] folder with its subfolders into its own directory and indexing it
+        With the fingerprint the export is archived for the following runs.
+        '''
+
+        export_path = self.export_folder_path(folder_id)
+        export_statement = self.construct_arg(
+            arg_type='export', folder_id=folder_id, local_target=export_path)
+
+        logging.debug(f"Running export statement: {export_statement}")
+        with self.metrics.phase('export', folder_id):
+            self.backend.run(export_statement)
+
+        if fingerprint is not None:
+            self.archive_export(from_params, folder_id, fingerprint)
+
+        self.index_export(folder_id)
+
+    def index_export(self, folder_id):
+
+        with self.metrics.phase('index_exports', folder_id) as phase:
+            phase.items = self.export_index.scan_export(self.export_folder_path(folder_id))
 
-        log = []
-        # 2 - Importing Content
-        for val in to_params['value']:
+    def value_export_folder(self, content_type, val, export_folders):
+        '''
+        Exported folder holding the configured value, None if it is in none of them
+        '''
+
+        folder_index = self.folder_indexes['from']
+        if content_type in ('dashboards', 'looks'):
+            entry = self.catalogs['from'][content_type].entry(val.strip('/'))
+            folder_id = entry.folder_id if entry else None
+        else:
+            folder_id = folder_index.find(val)
 
-            # find relative path from "from" environment
-            if to_params['type'] == 'dashboards':
-                new_val = self.all_dashboards['from'][val]
-            elif to_params['type'] == 'looks':
-                new_val = self.all_looks['from'][val]
+        if folder_id is None:
+            return None
+
+        return next((candidate for candidate in (folder_id, *folder_index.ancestors(folder_id))
+                     if candidate in export_folders), None)
+
+    def wait_for_export(self, content_type, val):
+        '''
+        Waiting until the folder holding the value is exported and indexed,
+        values outside of the exported folders wait for all exports
+        returns error of the failed export, None otherwise
+        '''
+
+        folder_id = self.value_export_folder(content_type, val, self.exports)
+        exports = [self.exports[folder_id]] if folder_id is not None else list(self.exports.values())
+
+        for future in exports:
+            try:
+                future.result()
+            except DeployCommandError as err:
+                return err
+
+        return None
+
+    def export_fingerprints(self, from_params, export_folders):
+        '''
+        Fingerprints of the exported folder trees, from the path of their folders and the updated_at
+        of their dashboards and looks
+        The exported trees are walked level by level and the dashboards and looks are listed folder by folder.
+        Trees of more than FINGERPRINT_FOLDER_LIMIT folders are fingerprinted from the listings of the whole
+        [from] instance instead, which then take fewer requests. Both give the same fingerprints.
+        returns dict: export folder id => fingerprint
+        '''
+        from export_cache import FolderFingerprint
+
+        session = self.get_session(from_params, 'from')
+        folder_index = self.folder_indexes['from']
+        fingerprints = {}
+        for folder_id in export_folders:
+            fingerprints[folder_id] = FolderFingerprint()
+            fingerprints[folder_id].add('folders', folder_id, folder_index.path(folder_id))
+
+        with self.metrics.phase('export_fingerprints') as phase, \
+                ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+
+            subfolders = self.walk_export_trees(executor, session, export_folders)
+            walked = subfolders is not None
+            if not walked:
+                logging.info(f'Exported folders hold more than {FINGERPRINT_FOLDER_LIMIT} folders, '
+                             f'listing all [FROM] content for their fingerprints.')
+                subfolders = self.instance_export_trees(session, export_folders)
+
+            # folder id => export folder id holding it
+            roots = {folder_id: folder_id for folder_id in export_folders}
+            for folder_id, (root, folder) in subfolders.items():
+                roots[folder_id] = root
+                fingerprints[root].add('folders', folder_id, folder['name'], folder['parent_id'])
+
+            if walked:
+                listings = [executor.submit(self.list_folder_content, session, content_type, folder_id)
+                            for content_type in ('dashboards', 'looks') for folder_id in roots]
+                records = (record for listing in listings for record in listing.result())
             else:
-                new_val = val
+                records = ((content_type, record) for content_type in ('dashboards', 'looks')
+                           for record in self.get_records(session, content_type, FINGERPRINT_FIELDS, keep=False,
+                                                          deleted='false'))
+
+            for content_type, record in records:
+                root = roots.get(str(record['folder_id']))
+                if root is not None:
+                    fingerprints[root].add(content_type, record['id'], record.get('updated_at'))
+                    phase.items += 1
+
+        return {folder_id: fingerprint.hexdigest() for folder_id, fingerprint in fingerprints.items()}
+
+    def walk_export_trees(self, executor, session, export_folders):
+        '''
+        Subfolders of the exported folders, the folders of one level are requested at once
+        returns dict: folder id => (export folder id, folder record),
+                None when there are more than FINGERPRINT_FOLDER_LIMIT of them
+        '''
+
+        subfolders = {}
+        level = [(folder_id, folder_id) for folder_id in export_folders]
+        while level:
+            listings = [executor.submit(self.list_subfolders, session, folder_id) for _, folder_id in level]
+
+            next_level = []
+            for (root, _), listing in zip(level, listings):
+                for folder in listing.result():
+                    subfolders[str(folder['id'])] = (root, folder)
+                    next_level.append((root, str(folder['id'])))
+
+            if len(subfolders) > FINGERPRINT_FOLDER_LIMIT:
+                return None
+            level = next_level
+
+        return subfolders
+
+    def instance_export_trees(self, session, export_folders):
+        '''
+        Subfolders of the exported folders, from the listing of all [from] folders
+        returns dict: folder id => (export folder id, folder record)
+        '''
+
+        folder_index = FolderPathIndex(self.get_records(session, 'folders', FOLDER_FIELDS))
+        export_folders = set(export_folders)
+
+        subfolders = {}
+        for folder_id in folder_index:
+            root = next((ancestor for ancestor in folder_index.ancestors(folder_id) if ancestor in export_folders),
+                        None)
+            if root is not None and folder_id not in export_folders:
+                subfolders[str(folder_id)] = (root, {'name': folder_index.name(folder_id),
+                                                     'parent_id': folder_index.parent_id(folder_id)})
+        return subfolders
+
+    def list_subfolders(self, session, folder_id):
+
+        return list(self.get_records(session, 'folders', FOLDER_FIELDS, keep=False, parent_id=folder_id))
+
+    def list_folder_content(self, session, content_type, folder_id):
+        '''
+        Dashboards or looks of one folder as (content type, record)
+        '''
+
+        records = self.get_records(session, content_type, FINGERPRINT_FIELDS, keep=False, deleted='false',
+                                   folder_id=folder_id)
+        return [(content_type, record) for record in records]
+
+    def restore_export(self, from_params, folder_id, fingerprint):
+        '''
+        Restoring the export of the folder from the archive of a previous run with the same fingerprint
+        returns True if it was restored
+        '''
+        import shutil
+        import tarfile
+        from export_cache import archive_name, archive_tag, cache_key, restore_archive
+
+        key = cache_key(from_params[KEY_BASE_URL], folder_id)
+        with self._state_lock:
+            archived = self.state.get(STATE_EXPORT_CACHE, {}).get(key)
+
+        name = archive_name(key, fingerprint)
+        archives = [
+            file_def for file_def in self.get_input_files_definitions(tags=[archive_tag(key)])
+            if file_def.name == name
+        ] if archived == fingerprint else []
+
+        if not archives:
+            logging.info(f'Folder [{folder_id}] changed since its last export or has no export archive, exporting it.')
+            return False
+
+        export_path = self.export_folder_path(folder_id)
+        try:
+            with self.metrics.phase('restore_export', folder_id):
+                restore_archive(archives[0].full_path, export_path)
+        except (OSError, tarfile.TarError) as err:
+            logging.warning(f'Export archive of folder [{folder_id}] could not be restored, exporting it: {err}')
+            shutil.rmtree(export_path, ignore_errors=True)
+            return False
+
+        logging.info(f'Folder [{folder_id}] has not changed since its last export, restored it from [{name}].')
+        return True
+
+    def archive_export(self, from_params, folder_id, fingerprint):
+        '''
+        Storing the export of the folder into the output files for the following runs
+        The archive is optional, when it cannot be written the deploy goes on without it.
+        '''
+        import tarfile
+        from export_cache import ARCHIVE_TAG, archive_name, archive_tag, cache_key, create_archive
+
+        key = cache_key(from_params[KEY_BASE_URL], folder_id)
+        file_def = self.create_out_file_definition(
+            archive_name(key, fingerprint), tags=[ARCHIVE_TAG, archive_tag(key)])
+
+        try:
+            with self.metrics.phase('archive_export', folder_id):
+                create_archive(self.export_folder_path(folder_id), file_def.full_path)
+            self.write_filedef_manifest(file_def)
+        except (OSError, tarfile.TarError) as err:
+            logging.warning(f'Export of folder [{folder_id}] could not be archived: {err}')
+            # a partial archive is not uploaded, the fingerprint is not kept
+            for path in (file_def.full_path, f'{file_def.full_path}.manifest'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return
+
+        with self._state_lock:
+            self.state.setdefault(STATE_EXPORT_CACHE, {})[key] = fingerprint
+
+    def resolve_deploy_content(self, from_params, content_type, values):
+        '''
+        Looking up only the configured values in the [from] environment
+        Dashboards and looks are searched by their title and folders by their name,
+        only the ancestors of the matching folders are requested to compare the paths.
+        '''
+
+        session = self.get_session(from_params, 'from')
+        folder_index = self.folder_indexes['from'] = FolderPathIndex()
+
+        with self.metrics.phase('resolve_content', content_type) as phase:
+            for folder_id in self.from_folder_ids(from_params):
+                self._add_ancestry(session, folder_index, folder_id, self.from_folders.get(folder_id))
+
+            for val in values:
+                if content_type == 'folders':
+                    found = self._resolve_folder(session, folder_index, val)
+                else:
+                    found = self._resolve_content(session, folder_index, content_type, val)
+
+                if found:
+                    phase.items += 1
+                else:
+                    logging.warning(f'[{val}] was not found in [FROM].')
+
+        logging.info(f'Resolved {phase.items} of {len(values)} {content_type}.')
+
+    def _resolve_content(self, session, folder_index, content_type, val):
+        '''
+        Registering the dashboards or looks with the given ui_path
+        Titles may contain "/", every split of the path is tried from the right.
+        '''
+
+        fields = DASHBOARD_FIELDS if content_type == 'dashboards' else LOOK_FIELDS
+        catalog = self.catalogs['from'][content_type]
+
+        parts = val.strip('/').split('/')
+        for split in range(len(parts) - 1, 0, -1):
+            folder_path, title = '/'.join(parts[:split]), '/'.join(parts[split:])
+
+            # search is case-insensitive and treats % and _ as wildcards, matches are compared exactly
+            for record in self.get_records(session, content_type, fields, deleted='false', title=title):
+                if record['title'] != title:
+                    continue
+
+                self._add_ancestry(session, folder_index, record['folder']['id'], record['folder'])
+                full_path = folder_index.resolve(record['folder'])
+                if full_path != folder_path:
+                    continue
+
+                catalog.add(record['id'], title, record['folder']['id'], full_path, record.get('updated_at'))
+
+            if folder_path + '/' + title in catalog:
+                return True
+
+        return False
+
+    def _resolve_folder(self, session, folder_index, val):
+        '''
+        Registering the ancestry of the folders with the given full path
+        '''
 
-            logging.info(f'Importing {to_params["type"]} - {new_val}')
+        name = val.strip('/').split('/')[-1]
+        for record in self.get_records(session, 'folders', FOLDER_FIELDS, name=name):
+            if record['name'] == name:
+                self._add_ancestry(session, folder_index, record['id'], record)
+
+        return folder_index.find(val) is not None
+
+    def _add_ancestry(self, session, folder_index, folder_id, folder=None):
+        '''
+        Adding the folder and all its ancestors into the index, each folder is requested once
+        '''
+
+        if folder_id in folder_index:
+            return
+
+        if folder is None:
+            folder = self._get_json(session, f'folders/{folder_id}', {'fields': FOLDER_FIELDS})
+        folder_index.add(folder['id'], folder['name'], folder['parent_id'])
+
+        if folder['parent_id'] is not None and folder['parent_id'] not in folder_index:
+            ancestors = self._get_json(session, f'folders/{folder_id}/ancestors', {'fields': FOLDER_FIELDS})
+            for ancestor in ancestors:
+                folder_index.add(ancestor['id'], ancestor['name'], ancestor['parent_id'])
+
+    def get_export_folders(self, from_params, content_type, values, targeted=False):
+        '''
+        Ids of the folders exported from the [from] environment
+        Targeted export includes only the folders holding the configured values, targeted
+        forces it regardless of the export mode.
+        Every folder is exported with its subfolders, so nested selections are dropped.
+        '''
+
+        folder_index = self.folder_indexes['from']
+        root_ids = self.from_folder_ids(from_params)
+        roots = [
+            folder_id for folder_id in root_ids
+            if not set(root_ids).intersection(folder_index.ancestors(folder_id))
+        ]
+
+        export_mode = self.configuration.parameters.get(KEY_EXPORT_MODE, EXPORT_MODE_FULL)
+        if not targeted and export_mode != EXPORT_MODE_TARGETED:
+            return roots
+
+        if content_type in ('dashboards', 'looks'):
+            # the same entry as the imports read
+            catalog = self.catalogs['from'][content_type]
+            entries = (catalog.entry(val.strip('/')) for val in values)
+            selected = [entry.folder_id for entry in entries if entry]
+        else:
+            selected = [folder_index.find(val) for val in values]
+
+        # only content of the configured [from] folders is deployed
+        selected = {
+            folder_id for folder_id in selected
+            if folder_id in folder_index
+            and (folder_id in roots or set(roots).intersection(folder_index.ancestors(folder_id)))
+        }
+        export_folders = sorted(
+            folder_id for folder_id in selected
+            if not selected.intersection(folder_index.ancestors(folder_id))
+        )
+
+        if not export_folders:
+            logging.warning('None of the configured values were found, exporting the whole folders.')
+            return roots
+
+        return export_folders
+
+    def plan(self):
+        '''
+        Comparing dashboards and looks of both environments by their ui_path
+        new - only in [from], missing - only in [to],
+        newer_in_from - updated in [from] after the last update in [to], not_newer_in_from otherwise
+        Only updated_at of both instances is compared, not the content.
+        '''
+
+        logging.info('Planning deployment.')
+
+        with TableWriter(self.tables_out_path, 'plan.csv', PLAN_COLUMNS) as writer:
+            for content_type in ('dashboards', 'looks'):
+                from_catalog = self.catalogs['from'][content_type]
+                to_catalog = self.catalogs['to'][content_type]
+
+                for ui_path in from_catalog:
+                    writer.writerow(self._plan_row(
+                        content_type, ui_path, from_catalog.entries(ui_path), to_catalog.entries(ui_path)))
+
+                for ui_path in to_catalog:
+                    if ui_path not in from_catalog:
+                        writer.writerow(self._plan_row(content_type, ui_path, [], to_catalog.entries(ui_path)))
+
+        logging.info(f'Plan contains {writer.rows_written} items.')
+
+    @staticmethod
+    def _plan_row(content_type, ui_path, from_entries, to_entries):
+
+        from_updated_at = max((entry.updated_at or '' for entry in from_entries), default='')
+        to_updated_at = max((entry.updated_at or '' for entry in to_entries), default='')
+
+        if not to_entries:
+            status = 'new'
+        elif not from_entries:
+            status = 'missing'
+        elif from_updated_at > to_updated_at:
+            status = 'newer_in_from'
+        else:
+            status = 'not_newer_in_from'
+
+        # the same ui_path used by several dashboards or looks of one environment
+        collision = [input_type for input_type, entries in (('from', from_entries), ('to', to_entries))
+                     if len(entries) > 1]
+
+        return {
+            'type': content_type,
+            'ui_path': ui_path,
+            'status': status,
+            'from_id': ';'.join(str(entry.id) for entry in from_entries),
+            'to_id': ';'.join(str(entry.id) for entry in to_entries),
+            'from_updated_at': from_updated_at,
+            'to_updated_at': to_updated_at,
+            'collision': ','.join(collision)
+        }
+
+    def import_content(self, to_params, section='to'):
+        '''
+        Importing all configured values with a bounded pool of workers
+        Values sharing a destination folder form a lane. The first value of every lane
+        is imported before the rest, so the destination folder is created only once.
+        The rest of a lane starts as soon as its first value is imported.
+        Folders are imported recursively, the rest of their lane stays sequential.
+        section - str: looker.ini section of the [to] environment
+        returns log rows in the order of the configured values
+        '''
+
+        values = to_params['value']
+        concurrency = max(1, int(self.configuration.parameters.get(
+            KEY_IMPORT_CONCURRENCY, DEFAULT_IMPORT_CONCURRENCY)))
+
+        lanes = {}
+        for index, val in enumerate(values):
+            lanes.setdefault(self._import_destination(to_params, val), []).append(index)
+
+        log = [None] * len(values)
+
+        def import_lane(indexes):
+            for index in indexes:
+                log[index] = self.import_value(to_params, values[index], section)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+            heads = {executor.submit(import_lane, lane[:1]): lane for lane in lanes.values()}
+
+            tails = []
+            for future in as_completed(heads):
+                future.result()
+                lane = heads[future]
+                if to_params['type'] == 'folders':
+                    tails.append(executor.submit(import_lane, lane[1:]))
+                else:
+                    tails.extend(executor.submit(import_lane, [index]) for index in lane[1:])
+
+            for future in tails:
+                future.result()
+
+        return log
+
+    @staticmethod
+    def _import_destination(to_params, val):
+        '''
+        Folder in the [to] environment the value is imported into
+        '''
+
+        if to_params['type'] == 'folders':
+            return f'{to_params["target_folder"]}/{val.strip("/").split("/")[-1]}'
+
+        return to_params['target_folder']
+
+    def import_value(self, to_params, val, section='to'):
+        '''
+        Importing one configured value
+        returns log row of the value
+        '''
+
+        target = self.target_name(to_params)
+
+        # find relative path from "from" environment
+        content_type = to_params['type']
+        if content_type in ('dashboards', 'looks'):
+            expected_path = self.catalogs['from'][content_type].full_path(val.strip('/'))
+        else:
+            expected_path = val
+
+        if expected_path is None:
+            return self.log_row(to_params, val, 'FAILED', f'[{val}] was not found in [FROM].')
+
+        # pipelined imports wait for the export of their folder
+        export_error = self.wait_for_export(content_type, val)
+        if export_error is not None:
+            return self.log_row(
+                to_params, val, 'FAILED', f'Export of [{val}] failed. {str(export_error)[-MAX_ISSUE_LENGTH:]}'.strip())
+
+        # Checking the configured value was exported, dashboards and looks are matched by their id first
+        if content_type in ('dashboards', 'looks'):
+            entry = self.catalogs['from'][content_type].entry(val.strip('/'))
+            new_val = self.export_index.find(content_type, entry.id, expected_path)
+        else:
+            new_val = self.export_index.find_folder(expected_path)
+
+        if new_val is not None:
+
+            if new_val != expected_path:
+                logging.info(f'[{val}] was matched by its id to [{new_val}].')
+
+            logging.info(f'Importing {content_type} - {new_val}')
             import_statement = self.construct_arg(
-                arg_type='import', type=to_params['type'], value=new_val, target_folder=to_params['target_folder'])
+                arg_type='import', type=content_type, value=new_val, target_folder=to_params['target_folder'],
+                env=section)
             logging.info(f'import statement: {import_statement}')
 
-            # Checking the path of the configured value exists
-
-            folder_path = '/data/exports/'
-            file_path = '/' + \
-                        os.path.join(*folder_path.split('/'), *new_val.split('/'))
-            logging.info(f'FILE_PATH: {file_path}')
+            # content deployed by the previous runs into the same target, hashed only to be skipped
+            skip_unchanged = self.configuration.parameters.get(KEY_SKIP_UNCHANGED)
+            if skip_unchanged:
+                deployed_hashes = self.get_deployed_hashes(to_params)
+                hash_key = f'{to_params["type"]}|{to_params["target_folder"]}|{val}'
+                content_hash = self.content_hash(self.export_file_path(new_val))
 
-            if os.path.exists(file_path):
+            if skip_unchanged and deployed_hashes.get(hash_key) == content_hash:
+                logging.info(f'[{val}] has not changed since the last deploy, skipping.')
+                status = 'UNCHANGED'
+                issue = ''
 
+            else:
+                # output is captured, so the output of parallel imports does not interleave
                 try:
-                    subprocess.run(import_statement, check=True)
+                    with self.metrics.phase('import', f'{target}|{val}' if section != 'to' else val) as phase:
+                        output = self.backend.run(import_statement)
+                        phase.items = 1
+                    logging.debug(f'[{val}] import output: {output}')
                     status = 'DEPLOYED'
                     issue = ''
-                except Exception:
+                    if skip_unchanged:
+                        deployed_hashes[hash_key] = content_hash
+                except DeployCommandError as err:
+                    logging.error(f'[{val}] import into [{target}] failed: {err}')
                     status = 'FAILED'
-                    issue = 'Request failed.'
+                    issue = f'Request failed. {str(err)[-MAX_ISSUE_LENGTH:]}'.strip()
 
-                tmp = {
-                    'date': CURRENT_DATE,
-                    'type': to_params['type'],
-                    'value': val,
-                    'status': status,
-                    'issue': issue
-                }
+            return self.log_row(to_params, val, status, issue)
 
-                log.append(tmp)
+        else:
 
-            else:
+            issue = f'[{val}] does not exist in path.'
+            candidates = self.export_index.candidates(content_type, expected_path)
+            if candidates:
+                issue = f'{issue} Similar exported {content_type}: {", ".join(candidates)}'
 
-                logging.warning(f'[{val}] does not exist in path.')
-                tmp = {
-                    'date': CURRENT_DATE,
-                    'type': to_params['type'],
-                    'value': val,
-                    'status': 'FAILED',
-                    'issue': f'[{val}] does not exist in path.'
-                }
-                log.append(tmp)
+            logging.warning(issue)
+            return self.log_row(to_params, val, 'FAILED', issue)
 
-        # Output log of the run
-        log_df = pd.DataFrame(log)
-        log_file_path = os.path.join(self.tables_out_path, 'log.csv')
-        log_df.to_csv(log_file_path, index=False)
+    def log_row(self, to_params, val, status, issue=''):
+        '''
+        Row of the deploy log, stamped when the value is done
+        '''
 
-        log_manifest = {
-            'incremental': True,
-            'primary_key': ['date', 'type', 'value']
+        return {
+            'date': datetime.now().strftime(LOG_DATE_FORMAT),
+            'target': self.target_name(to_params),
+            'type': to_params['type'],
+            'value': val,
+            'status': status,
+            'issue': issue
         }
-        log_manifest_path = os.path.join(
-            self.tables_out_path, 'log.csv.manifest')
-        with open(log_manifest_path, 'w') as json_file:
-            json.dump(log_manifest, json_file)
+
+    def get_deployed_hashes(self, to_params):
+        '''
+        Content hashes of the values deployed into the [to] environment, kept in the state
+        '''
+
+        with self._state_lock:
+            return self.state.setdefault(STATE_DEPLOYED_HASHES, {}).setdefault(to_params[KEY_BASE_URL], {})
+
+    @staticmethod
+    def content_hash(path):
+        '''
+        SHA-256 of the exported file, or of all files of an exported folder
+        '''
+
+        content_hash = hashlib.sha256()
+
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = sorted(
+                os.path.join(root, filename)
+                for root, _, filenames in os.walk(path)
+                for filename in filenames
+            )
+
+        for file_path in files:
+            # renamed or moved files change the hash of a folder
+            content_hash.update(os.path.relpath(file_path, path).encode())
+            with open(file_path, 'rb') as file:
+                for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+                    content_hash.update(chunk)
+
+        return content_hash.hexdigest()
+
+    def fetch_all_details(self, environments):
+        '''
+        Fetching details of several environments concurrently
+        environments - list: (params, input_type) of each environment
+        '''
+
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            futures = [
+                future
+                for params, input_type in environments
+                for future in self._submit_fetch(executor, params, input_type)
+            ]
+
+        # re-raising the first failure
+        for future in futures:
+            future.result()
 
     def fetch_details(self, params, input_type):
         '''
@@ -428,192 +1285,502 @@ class Component(CommonInterface):
         type - str: FROM/TO environment, use for the output table name
         '''
 
-        # Credentials
-        url = params.get(KEY_BASE_URL)
-        client_id = params.get(KEY_CLIENT_ID)
-        client_secret = params.get(KEY_CLIENT_SECRET)
-        token = self.authorize(url=url, client_id=client_id,
-                               client_secret=client_secret)
+        self.fetch_all_details([(params, input_type)])
+
+    def _submit_fetch(self, executor, params, input_type):
+        '''
+        Submitting all requests of one environment
+        Dashboards and looks are requested right away and wait for the folders
+        only when their paths are resolved.
+        Tasks are submitted after the ones they depend on, so they cannot block the pool.
+        '''
+
+        # the first request logs in, the others wait for its token
+        session = self.get_session(params, input_type)
 
         # folders
-        out_folders, folder_hierarchy = self.get_folder_details(url, token)
-        self._output(out_folders, f'{input_type}_folders.csv')
+        folders = executor.submit(self._fetch_folders, session, input_type)
 
         # dashboard
-        out_dashboards = self.get_dashboard_details(
-            url, token, folder_hierarchy, input_type)
-        self._output(out_dashboards, f'{input_type}_dashboards.csv')
+        dashboards = executor.submit(
+            self._fetch_dashboards, session, folders, input_type)
 
         # looks
-        out_looks = self.get_looks_details(
-            url, token, folder_hierarchy, input_type)
-        self._output(out_looks, f'{input_type}_looks.csv')
+        looks = executor.submit(
+            self._fetch_looks, session, folders, input_type)
 
-    def get_dashboard_details(self, url, token, folder_hierarchy, input_type):
+        return [folders, dashboards, looks]
+
+    def _fetch_folders(self, session, input_type):
+
+        with self.metrics.phase('get_folder_details', input_type) as phase:
+            folder_index = self.get_folder_details(session)
+            phase.items = len(folder_index)
+
+        if self.incremental_fetch:
+            self.moved_folders[input_type] = self.update_folder_paths(session.base_url, folder_index)
+        self.folder_indexes[input_type] = folder_index
+        out_folders = self.folder_rows(session.base_url, folder_index)
+        if self.incremental_fetch:
+            self._output(out_folders, f'{input_type}_folders.csv', FOLDER_COLUMNS, primary_key=['id'])
+        else:
+            self._output(out_folders, f'{input_type}_folders.csv', FOLDER_COLUMNS)
+
+        return folder_index
+
+    def update_folder_paths(self, url, folder_index):
         '''
-        Getting all dashboard paths
+        Ids of the folders whose path changed since the previous run
+        Hashes of the folder paths are kept in the state.
         '''
-        logging.info('Fetching dashboard details.')
 
-        request_url = urllib.parse.urljoin(url, '/api/4.0/dashboards')
-        request_header = {
-            'Authorization': 'Bearer {}'.format(token),
-            'Content-Type': 'application/json'
-        }
+        paths = {str(folder_id): hashlib.sha1(folder_index.path(folder_id).encode()).hexdigest()[:PATH_HASH_LENGTH]
+                 for folder_id in folder_index}
 
-        res = requests.get(request_url, headers=request_header)
+        with self._state_lock:
+            folder_paths = self.state.setdefault(STATE_FOLDER_PATHS, {})
+            previous = folder_paths.get(url, {})
+            folder_paths[url] = paths
 
-        data_out = []
-        logging.info(f'Total Dashboards - {len(res.json())}')
+        moved = {folder_id for folder_id, path in paths.items() if previous.get(folder_id, path) != path}
+        if moved:
+            logging.info(f'{len(moved)} folders were renamed or moved since the previous run.')
+        return moved
 
-        for dashboard in res.json():
+    def _moved_folders(self, folders, input_type):
+        '''
+        Folders renamed or moved since the previous run, waits for the folders to be fetched
+        '''
 
-            # for Fetch-details
-            tmp = {
-                'environment': url,
-                'dashboard_id': f"{dashboard['id']}",
-                'title': dashboard['title'],
-                'space': dashboard.get('space', {}).get('name'),
-                'folder': dashboard['folder']['name'],
-                'full_name': f'Dashboard_{dashboard["id"]}_{dashboard["title"]}.json'
-            }
+        self._result(folders)
+        return self.moved_folders.get(input_type, set())
 
-            full_path = f'{dashboard["folder"]["name"]}'
-            parent_id = dashboard['folder']['parent_id']
+    def _fetch_dashboards(self, session, folder_index, input_type):
 
-            while parent_id:
+        # rows are written while they are fetched, the phase includes writing
+        with self.metrics.phase('get_dashboard_details', input_type) as phase:
+            out_dashboards = self.get_dashboard_details(
+                session, folder_index, input_type)
+            if self.incremental_fetch:
+                phase.items = self._output(out_dashboards, f'{input_type}_dashboards.csv',
+                                           DASHBOARD_COLUMNS + INCREMENTAL_COLUMNS, primary_key=['dashboard_id'])
+            else:
+                phase.items = self._output(out_dashboards, f'{input_type}_dashboards.csv', DASHBOARD_COLUMNS)
 
-                if parent_id not in folder_hierarchy:
-                    parent_id = ''
+        if self.fetch_elements:
+            self._fetch_dashboard_elements(session, input_type)
 
-                else:
-                    full_path = f'{folder_hierarchy[parent_id]["name"]}/{full_path}'
-                    parent_id = folder_hierarchy[parent_id]["parent_id"]
+    @property
+    def element_concurrency(self):
+        '''
+        Dashboards whose elements are requested at once, 0 when they are not fetched
+        The sessions are sized for it before the mode is checked.
+        '''
+
+        if not self.configuration.parameters.get(KEY_DASHBOARD_ELEMENTS):
+            return 0
+        return max(1, int(self.configuration.parameters.get(KEY_ELEMENT_CONCURRENCY, DEFAULT_ELEMENT_CONCURRENCY)))
+
+    def _fetch_dashboard_elements(self, session, input_type):
+        '''
+        Fetching elements of the fetched dashboards, one request per dashboard
+        A bounded number of requests run at once over the pooled connections, their rows are written
+        by the calling thread as they complete. Queries shared by several elements are written once.
+        '''
+
+        logging.info('Fetching dashboard elements.')
 
-            tmp['full_path'] = f'{full_path}/{tmp["full_name"]}'
-            tmp['ui_path'] = f'{full_path}/{tmp["title"]}'
+        catalog = self.catalogs[input_type]['dashboards']
+        dashboard_ids = (entry.id for ui_path in catalog for entry in catalog.entries(ui_path))
+        concurrency = self.element_concurrency
 
-            data_out.append(tmp)
+        # elements and queries of the changed dashboards only are fetched incrementally
+        primary_key = ['environment', 'id'] if self.incremental_fetch else None
+        with self.metrics.phase('get_dashboard_elements', input_type) as phase, \
+                TableWriter(self.tables_out_path, f'{input_type}_dashboard_elements.csv', ELEMENT_COLUMNS,
+                            incremental=bool(primary_key), primary_key=primary_key) as elements, \
+                TableWriter(self.tables_out_path, f'{input_type}_queries.csv', QUERY_COLUMNS,
+                            incremental=bool(primary_key), primary_key=primary_key) as queries:
 
-            # for deploy endpoint
-            dashboard_ui_path = tmp['ui_path']
-            dashboard_actual_path = tmp['full_path']
-            self.all_dashboards[input_type][dashboard_ui_path] = dashboard_actual_path
+            query_ids = set()
 
-        return data_out
+            def write(done):
+                for future in done:
+                    for element in future.result():
+                        elements.writerow(self.element_row(session.base_url, element))
+                        query = self.element_query(element)
+                        if query and query.get('id') not in query_ids:
+                            query_ids.add(query.get('id'))
+                            queries.writerow(self.query_row(session.base_url, query))
 
-    def get_folder_details(self, url, token):
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                pending = set()
+                for dashboard_id in dashboard_ids:
+                    pending.add(executor.submit(self.get_dashboard_elements, session, dashboard_id, phase))
+
+                    # bounded backlog, so the elements of thousands of dashboards are not held at once
+                    if len(pending) >= concurrency * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        write(done)
+
+                write(as_completed(pending))
+
+            phase.items = elements.rows_written
+
+        logging.info(f'Total Dashboard elements - {elements.rows_written}, queries - {queries.rows_written}')
+
+    def get_dashboard_elements(self, session, dashboard_id, phase):
         '''
-        Getting all folder details
+        Elements of one dashboard, an empty list if the dashboard no longer exists
+        phase - the requests are counted into the phase of the calling thread
         '''
 
-        logging.info('Fetching folder details.')
-        request_url = urllib.parse.urljoin(url, '/api/4.0/folders')
-        request_header = {
-            'Authorization': 'Bearer {}'.format(token),
-            'Content-Type': 'application/json'
+        endpoint = f'dashboards/{dashboard_id}/dashboard_elements'
+        with self.metrics.attach(phase):
+            res = session.get(endpoint, params={'fields': ELEMENT_FIELDS})
+
+        if res.status_code == 404:
+            logging.warning(f'Dashboard [{dashboard_id}] was not found, skipping its elements.')
+            return []
+
+        if res.status_code != 200:
+            logging.error(
+                f'Request to [{session.url(endpoint)}] failed: {res.status_code} - {res.text}')
+            sys.exit(1)
+
+        return res.json()
+
+    @staticmethod
+    def element_query(element):
+
+        for source in (element, element.get('result_maker'), element.get('look')):
+            if source and source.get('query'):
+                return source['query']
+
+        return None
+
+    def element_row(self, url, element):
+
+        query = self.element_query(element)
+        return {
+            'environment': url,
+            'id': element['id'],
+            'dashboard_id': element.get('dashboard_id'),
+            'title': element.get('title'),
+            'type': element.get('type'),
+            'look_id': element.get('look_id'),
+            'query_id': query.get('id') if query else element.get('query_id')
         }
 
-        res = requests.get(request_url, headers=request_header)
+    @staticmethod
+    def query_row(url, query):
+
+        row = {'environment': url}
+        for column in QUERY_COLUMNS[1:]:
+            value = query.get(column)
+            # lists and objects are kept as JSON
+            row[column] = json.dumps(value) if isinstance(value, (list, dict)) else value
+        return row
+
+    def _fetch_looks(self, session, folder_index, input_type):
+
+        with self.metrics.phase('get_looks_details', input_type) as phase:
+            out_looks = self.get_looks_details(
+                session, folder_index, input_type)
+            if self.incremental_fetch:
+                phase.items = self._output(out_looks, f'{input_type}_looks.csv',
+                                           LOOK_COLUMNS + INCREMENTAL_COLUMNS, primary_key=['id'])
+            else:
+                phase.items = self._output(out_looks, f'{input_type}_looks.csv', LOOK_COLUMNS)
 
-        # as a output
-        data_out = []
-        # for fetching parent table purposes
-        hierarchy = {}
+    @staticmethod
+    def _result(value):
+        '''
+        Result of a future, plain values are returned as they are
+        '''
 
-        for folder in res.json():
-            tmp = {
-                'environemnt': url,
-                'id': f"{folder['id']}",
-                'name': folder['name'],
-                # 'parent_id': f"{folder['parent_id']}"
-                'parent_id': folder['parent_id']
+        return value.result() if isinstance(value, Future) else value
+
+    def get_content_records(self, session, endpoint, fields, moved_folders=None):
+        '''
+        Streaming dashboards or looks, read once per run so they are not kept in memory
+        In incremental mode only the ones created, updated or deleted since the watermark
+        of the previous run are streamed, the new watermark is kept in the state.
+        moved_folders - callable: ids of the folders renamed or moved since the previous run,
+                        the content in them is streamed again as its paths changed
+        '''
+
+        if not self.incremental_fetch:
+            yield from self.get_records(session, endpoint, fields, keep=False, deleted='false')
+            return
+
+        with self._state_lock:
+            watermarks = self.state.setdefault(
+                STATE_FETCH_WATERMARKS, {}).setdefault(session.base_url, {})
+        watermark = watermarks.get(endpoint)
+
+        if watermark is None:
+            logging.info(f'No watermark of [{endpoint}] found, fetching all of them.')
+            records = self.get_records(session, endpoint, fields, keep=False, deleted='false')
+        else:
+            logging.info(f'Fetching [{endpoint}] changed since [{watermark}].')
+            records = self.get_changed_records(session, endpoint, fields, watermark, moved_folders)
+
+        latest = watermark
+        for record in records:
+            changed_at = record.get('deleted_at') or record.get('updated_at')
+            if changed_at and (latest is None or changed_at > latest):
+                latest = changed_at
+            yield record
+
+        # moved only once all changes were streamed
+        with self._state_lock:
+            watermarks[endpoint] = latest
+
+    def get_changed_records(self, session, endpoint, fields, watermark, moved_folders=None):
+        '''
+        Streaming records updated or deleted since the watermark, newest first
+        Paging stops at the first record older than the watermark.
+        Records in the folders renamed or moved since the previous run follow, requested
+        by a full listing only when there are any.
+        '''
+
+        page_size = self.configuration.parameters.get(
+            KEY_PAGE_SIZE, DEFAULT_PAGE_SIZE) or DEFAULT_PAGE_SIZE
+
+        # ids of the updated records, they are not streamed again with the moved folders
+        streamed = set()
+        updated = self.get_records(
+            session, endpoint, fields, page_size=page_size, keep=False, deleted='false', sorts='updated_at desc')
+        for record in updated:
+            if (record.get('updated_at') or '') < watermark:
+                break
+            streamed.add(record['id'])
+            yield record
+
+        deleted = self.get_records(
+            session, endpoint, f'{fields},deleted_at', page_size=page_size, keep=False, deleted='true',
+            sorts='deleted_at desc')
+        for record in deleted:
+            if (record.get('deleted_at') or '') < watermark:
+                break
+            record['deleted'] = True
+            yield record
+
+        moved = moved_folders() if moved_folders else set()
+        if not moved:
+            return
+
+        logging.info(f'Fetching [{endpoint}] in the {len(moved)} renamed or moved folders.')
+        for record in self.get_records(session, endpoint, fields, keep=False, deleted='false'):
+            if str((record.get('folder') or {}).get('id')) in moved and record['id'] not in streamed:
+                streamed.add(record['id'])
+                yield record
+
+    def get_records(self, session, endpoint, fields, page_size=None, keep=True, **filters):
+        '''
+        Streaming records of the endpoint page by page
+        endpoint - str: folders/dashboards/looks, paged through its search endpoint
+        fields - str: attributes requested from the API
+        page_size - int: overrides the configured page size
+        keep - bool: keeps the listing in memory, False for listings read once per run
+        filters: additional query parameters of the search endpoint
+        Listings read completely are cached, the same listing is requested only once.
+        '''
+
+        if page_size is None:
+            page_size = self.configuration.parameters.get(
+                KEY_PAGE_SIZE, DEFAULT_PAGE_SIZE)
+
+        key = (session.base_url, session.client_id, endpoint, fields, page_size, tuple(sorted(filters.items())))
+        yield from self.response_cache.records(
+            key, lambda: self._get_pages(session, endpoint, fields, page_size, filters), keep=keep)
+
+    def _get_pages(self, session, endpoint, fields, page_size, filters):
+
+        # paging disabled, fetching everything in one request, filters need the search endpoint
+        if not page_size:
+            yield from self._get_json(
+                session, f'{endpoint}/search' if filters else endpoint, {'fields': fields, **filters})
+            return
+
+        offset = 0
+        while True:
+            request_params = {
+                'fields': fields,
+                'limit': page_size,
+                'offset': offset,
+                # stable order is required for offset paging
+                'sorts': 'id',
+                **filters
             }
-            data_out.append(tmp)
+            page = self._get_json(session, f'{endpoint}/search', request_params)
+            yield from page
+
+            if len(page) < page_size:
+                break
+            offset += page_size
+
+    def _get_json(self, session, endpoint, request_params):
+
+        res = session.get(endpoint, params=request_params)
+
+        if res.status_code != 200:
+            logging.error(
+                f'Request to [{session.url(endpoint)}] failed: {res.status_code} - {res.text}')
+            sys.exit(1)
 
-            hierarchy[folder['id']] = {
-                'name': folder['name'],
-                'parent_id': folder['parent_id']
+        return res.json()
+
+    def get_dashboard_details(self, session, folder_index, input_type):
+        '''
+        Getting all dashboard paths
+        '''
+        logging.info('Fetching dashboard details.')
+
+        total = 0
+        url = session.base_url
+        catalog = self.catalogs[input_type]['dashboards']
+        dashboards = self.get_content_records(session, 'dashboards', DASHBOARD_FIELDS,
+                                              lambda: self._moved_folders(folder_index, input_type))
+        for dashboard in dashboards:
+
+            # the first page is already fetched while the folders may still be loading
+            folder_index = self._result(folder_index)
+
+            # for deploy endpoint and plan, the row is built from the catalog entry
+            entry = catalog.add(dashboard['id'], dashboard['title'], dashboard['folder']['id'],
+                                folder_index.resolve(dashboard['folder']), dashboard.get('updated_at'))
+
+            # for Fetch-details
+            full_name = catalog.file_name(entry)
+            tmp = {
+                'environment': url,
+                'dashboard_id': f"{entry.id}",
+                'title': entry.title,
+                'space': (dashboard.get('space') or {}).get('name'),
+                'folder': dashboard['folder']['name'],
+                'full_name': full_name,
+                'full_path': f'{entry.folder_path}/{full_name}',
+                'ui_path': entry.ui_path,
+                'updated_at': entry.updated_at,
+                'deleted': dashboard.get('deleted', False)
             }
 
-        # adding full_path
-        data_out_v2 = []
-        for folder in data_out:
+            total += 1
+            yield tmp
 
-            tmp = folder.copy()
-            parent_id = tmp['parent_id']
-            full_path = tmp['name']
+        logging.info(f'Total Dashboards - {total}')
 
-            # while parent_id and parent_id != 'None':
-            while parent_id:
+    def get_folder_details(self, session):
+        '''
+        Getting all folder details
+        '''
 
-                if parent_id not in hierarchy:
-                    parent_id = ''
+        logging.info('Fetching folder details.')
 
-                else:
-                    full_path = f'{hierarchy[parent_id]["name"]}/{full_path}'
-                    parent_id = hierarchy[parent_id]["parent_id"]
+        # paths are resolved once all folders are known
+        return FolderPathIndex(self.get_records(session, 'folders', FOLDER_FIELDS))
 
-            tmp['full_path'] = full_path
-            data_out_v2.append(tmp)
+    @staticmethod
+    def folder_rows(url, folder_index):
+        '''
+        Rows of the folders output table, read from the folder index
+        '''
 
-        return data_out_v2, hierarchy
+        for folder_id in folder_index:
+            yield {
+                'environemnt': url,
+                'id': f"{folder_id}",
+                'name': folder_index.name(folder_id),
+                # 'parent_id': f"{folder['parent_id']}"
+                'parent_id': folder_index.parent_id(folder_id),
+                'full_path': folder_index.path(folder_id)
+            }
 
-    def get_looks_details(self, url, token, folder_hierarchy, input_type):
+    def get_looks_details(self, session, folder_index, input_type):
 
         logging.info('Fetching Looks details.')
-        request_url = urllib.parse.urljoin(url, '/api/4.0/looks')
-        request_header = {
-            'Authorization': 'Bearer {}'.format(token),
-            'Content-Type': 'application/json'
-        }
-
-        res = requests.get(request_url, headers=request_header)
 
-        data_out = []
+        total = 0
+        url = session.base_url
+        catalog = self.catalogs[input_type]['looks']
+        looks = self.get_content_records(session, 'looks', LOOK_FIELDS,
+                                         lambda: self._moved_folders(folder_index, input_type))
+        for look in looks:
 
-        logging.info(f'Total Looks - {len(res.json())}')
+            # the first page is already fetched while the folders may still be loading
+            folder_index = self._result(folder_index)
 
-        for look in res.json():
+            # for deploy endpoint and plan, the row is built from the catalog entry
+            entry = catalog.add(look['id'], look['title'], look['folder_id'],
+                                folder_index.resolve(look['folder']), look.get('updated_at'))
 
+            full_name = catalog.file_name(entry)
             tmp = {
                 'url': url,
-                'id': look['id'],
-                'title': look['title'],
+                'id': entry.id,
+                'title': entry.title,
                 'public': look['public'],
                 'folder': look['folder']['name'],
-                'folder_id': look['folder_id'],
-                'full_name': f'Look_{look["id"]}_{look["title"]}.json'
+                'folder_id': entry.folder_id,
+                'full_name': full_name,
+                'full_path': f'{entry.folder_path}/{full_name}',
+                'ui_path': entry.ui_path,
+                'updated_at': entry.updated_at,
+                'deleted': look.get('deleted', False)
             }
 
-            full_path = f'{look["folder"]["name"]}'
-            parent_id = look['folder']['parent_id'] if look['folder']['parent_id'] else None
+            total += 1
+            yield tmp
+
+        logging.info(f'Total Looks - {total}')
 
-            while parent_id:
+    def _output(self, data, filename, columns, primary_key=None):
+        '''
+        Writing rows into the output table as they are produced
+        primary_key - list: loads the table incrementally
+        '''
 
-                if parent_id not in folder_hierarchy:
-                    parent_id = ''
+        # only the writing is measured, rows may be fetched while they are iterated
+        write_time = 0.0
+        with TableWriter(self.tables_out_path, filename, columns,
+                         incremental=bool(primary_key), primary_key=primary_key) as writer:
+            for row in data:
+                start = time.perf_counter()
+                writer.writerow(row)
+                write_time += time.perf_counter() - start
 
-                else:
-                    full_path = f'{folder_hierarchy[parent_id]["name"]}/{full_path}'
-                    parent_id = folder_hierarchy[parent_id]["parent_id"]
+        self.metrics.record('_output', filename, duration=write_time, items=writer.rows_written)
 
-            tmp['full_path'] = f'{full_path}/{tmp["full_name"]}'
-            tmp['ui_path'] = f'{full_path}/{tmp["title"]}'
+        return writer.rows_written
 
-            data_out.append(tmp)
+    def write_profile(self):
+        '''
+        Profile of the run into the output files and its summary into the log
+        '''
+
+        self.profiler.stop()
+        self.profiler.log_summary()
 
-            # for deploy endpoint
-            look_ui_path = tmp['ui_path']
-            look_actual_path = tmp['full_path']
-            self.all_looks[input_type][look_ui_path] = look_actual_path
+        for name, write in (('profile.prof', self.profiler.write_stats), ('profile.txt', self.profiler.write_report)):
+            file_def = self.create_out_file_definition(f'{self.metrics.run_id}_{name}', tags=[PROFILE_TAG])
+            write(file_def.full_path)
+            self.write_filedef_manifest(file_def)
 
-        return data_out
+        logging.info(f'Profile written into the output files tagged [{PROFILE_TAG}].')
 
-    def _output(self, data, filename):
+    def write_metrics(self):
+        '''
+        Summary of the run phases into the log and the run_metrics table
+        '''
 
-        data_in = pd.DataFrame(data)
-        data_in.to_csv(f'{self.tables_out_path}/{filename}', index=False)
+        self.metrics.log_summary()
+        logging.info(
+            f'Response cache: {self.response_cache.hits} hits, {self.response_cache.misses} misses')
+        with TableWriter(self.tables_out_path, 'run_metrics.csv', METRICS_COLUMNS,
+                         incremental=True, primary_key=METRICS_PRIMARY_KEY) as writer:
+            writer.writerows(self.metrics.rows())
 
 
 """
@@ -0,0 +1,149 @@
+'''
+Execution backends of looker_deployer (ldeploy) commands.
+
+'''
+import argparse
+import functools
+import logging
+import subprocess
+import threading
+
+BACKEND_SUBPROCESS = 'subprocess'
+BACKEND_IN_PROCESS = 'in_process'
+
+# parent logger of the looker_deployer modules
+LIBRARY_LOGGER = 'looker_deployer'
+
+
+class DeployCommandError(Exception):
+    '''
+    ldeploy command failed, message holds its error output
+    '''
+    pass
+
+
+class SubprocessBackend:
+    '''
+    Running every ldeploy command in a new process
+    '''
+
+    name = BACKEND_SUBPROCESS
+
+    def run(self, arg):
+        '''
+        arg - list: ldeploy command line as built by Component.construct_arg
+        returns output of the command
+        '''
+
+        try:
+            result = subprocess.run(arg, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as err:
+            raise DeployCommandError((err.stderr or '').strip() or str(err)) from err
+        except OSError as err:
+            raise DeployCommandError(str(err)) from err
+
+        return result.stdout
+
+
+class InProcessBackend:
+    '''
+    Calling looker_deployer inside the component process
+    The command line is parsed with looker_deployer's own parser and its command function
+    is called directly. SDK clients are created once per (ini, env) and reused by all commands.
+    looker_deployer is not known to be thread safe, the commands run one at a time.
+    '''
+
+    name = BACKEND_IN_PROCESS
+
+    def __init__(self):
+        # imported here, subprocess backend does not need the library loaded
+        from looker_deployer import cli
+        from looker_deployer.commands import deploy_content, deploy_content_export
+
+        parser = argparse.ArgumentParser(prog='ldeploy')
+        subparsers = parser.add_subparsers()
+        cli.setup_content_subparser(subparsers)
+        self._parser = parser
+        self._lock = threading.Lock()
+
+        # every command module looks the client up by its own name
+        for module in (deploy_content, deploy_content_export):
+            if hasattr(module, 'get_client'):
+                module.get_client = self._cached_client(module.get_client)
+
+    @staticmethod
+    def _cached_client(get_client):
+
+        lock = threading.Lock()
+
+        @functools.lru_cache(maxsize=None)
+        def create_client(ini, env):
+            logging.debug(f'Creating Looker SDK client for [{env}]')
+            return get_client(ini, env)
+
+        @functools.wraps(get_client)
+        def cached_client(ini, env):
+            with lock:
+                return create_client(ini, env)
+
+        return cached_client
+
+    def run(self, arg):
+        '''
+        arg - list: ldeploy command line as built by Component.construct_arg
+        returns log output of the command
+        '''
+
+        with self._lock, CapturedLog(LIBRARY_LOGGER) as log:
+            try:
+                args = self._parser.parse_args(arg[1:])
+                args.func(args)
+            except SystemExit as err:
+                if err.code:
+                    raise DeployCommandError(log.text() or f'ldeploy exited with code {err.code}') from err
+            except Exception as err:
+                raise DeployCommandError('\n'.join(filter(None, (log.text(), str(err))))) from err
+
+        return log.text()
+
+
+class CapturedLog(logging.Handler):
+    '''
+    Records of the logger and its children logged while the context is entered
+    The records are still passed to the job log.
+    '''
+
+    def __init__(self, name):
+        super().__init__(level=logging.DEBUG)
+        self.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self._logger = logging.getLogger(name)
+        self._lines = []
+
+    def emit(self, record):
+        self._lines.append(self.format(record))
+
+    def text(self):
+        return '\n'.join(self._lines).strip()
+
+    def __enter__(self):
+        self._logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._logger.removeHandler(self)
+
+
+def create_backend(name):
+    '''
+    Backend of the given name, falls back to subprocess when looker_deployer
+    cannot be called in process
+    '''
+
+    if name == BACKEND_IN_PROCESS:
+        try:
+            return InProcessBackend()
+        except Exception as err:
+            logging.warning(
+                f'looker_deployer cannot run in process ({err}), falling back to [{BACKEND_SUBPROCESS}].')
+
+    return SubprocessBackend()
@@ -0,0 +1,71 @@
+'''
+Archives of exported folders reused by the following deploys.
+
+'''
+import hashlib
+import os
+import tarfile
+
+ARCHIVE_TAG = 'looker_deployer_export'
+
+
+def cache_key(base_url, folder_id):
+    '''
+    Key of the exported folder, the same for every run deploying from it
+    '''
+
+    return hashlib.sha256(f'{base_url}|{folder_id}'.encode()).hexdigest()[:16]
+
+
+def archive_tag(key):
+    return f'{ARCHIVE_TAG}_{key}'
+
+
+def archive_name(key, fingerprint):
+    return f'{archive_tag(key)}_{fingerprint[:16]}.tar.gz'
+
+
+class FolderFingerprint:
+    '''
+    Hash of the folders, dashboards and looks of an exported folder tree
+    It is the sum of the hashes of their attributes, so it does not depend on the order they are listed in.
+    '''
+
+    def __init__(self):
+        self._sum = 0
+
+    def add(self, content_type, *attributes):
+        digest = hashlib.sha256('|'.join([content_type, *map(str, attributes)]).encode()).digest()
+        self._sum = (self._sum + int.from_bytes(digest, 'big')) % 2 ** 256
+
+    def hexdigest(self):
+        return f'{self._sum:064x}'
+
+
+def create_archive(export_path, archive_path):
+    '''
+    Compressing the exported tree, paths in the archive are relative to export_path
+    '''
+
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        for name in sorted(os.listdir(export_path)):
+            archive.add(os.path.join(export_path, name), arcname=name)
+
+
+def restore_archive(archive_path, export_path):
+    '''
+    Extracting the exported tree, members outside of export_path are refused
+    '''
+
+    os.makedirs(export_path, exist_ok=True)
+    with tarfile.open(archive_path, 'r:gz') as archive:
+        if hasattr(tarfile, 'data_filter'):
+            archive.extractall(export_path, filter='data')
+            return
+
+        root = os.path.realpath(export_path)
+        for member in archive.getmembers():
+            target = os.path.realpath(os.path.join(root, member.name))
+            if not (member.isfile() or member.isdir()) or os.path.commonpath([root, target]) != root:
+                raise tarfile.TarError(f'Refusing to extract [{member.name}] from [{archive_path}].')
+        archive.extractall(export_path)
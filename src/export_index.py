@@ -0,0 +1,126 @@
+'''
+Index of the content exported by looker_deployer.
+
+'''
+import difflib
+import os
+import re
+import threading
+
+# Dashboard_<id>_<title>.json, Look_<id>_<title>.json
+EXPORT_FILE_PATTERN = re.compile(r'^(Dashboard|Look)_([^_]+)_(.*)\.json$')
+CONTENT_TYPES = {'Dashboard': 'dashboards', 'Look': 'looks'}
+
+MAX_CANDIDATES = 3
+CANDIDATE_CUTOFF = 0.6
+
+
+class ExportIndex:
+    '''
+    Exported dashboards, looks and folders, scanned once after the export
+    Paths are relative to the export directory and use "/" as in the full_path column,
+    several export directories are merged into one index. Directories can be added
+    while the index is read, e.g. by pipelined imports.
+    '''
+
+    def __init__(self):
+        # (content type, id) => path
+        self._ids = {}
+        # content type => path => export directory
+        self._paths = {'dashboards': {}, 'looks': {}, 'folders': {}}
+        # (content type, parent folder) => paths
+        self._siblings = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def scan(cls, export_paths):
+        '''
+        export_paths - list: directories the content was exported into
+        '''
+
+        index = cls()
+        for export_path in export_paths:
+            index.scan_export(export_path)
+
+        return index
+
+    def scan_export(self, export_path):
+        '''
+        Adding the content of one export directory
+        returns number of the added dashboards and looks
+        '''
+
+        added = len(self)
+        for root, folders, files in os.walk(export_path):
+            relative_root = os.path.relpath(root, export_path).replace(os.sep, '/')
+            prefix = '' if relative_root == '.' else f'{relative_root}/'
+
+            for folder in folders:
+                self.add('folders', None, f'{prefix}{folder}', export_path)
+
+            for file in files:
+                match = EXPORT_FILE_PATTERN.match(file)
+                if match:
+                    self.add(CONTENT_TYPES[match.group(1)], match.group(2), f'{prefix}{file}', export_path)
+
+        return len(self) - added
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, content_type, content_id, path, export_path):
+        with self._lock:
+            paths = self._paths[content_type]
+            # the same folder may be exported by several exports, the first one is kept
+            if path in paths:
+                return
+
+            paths[path] = export_path
+            if content_id is not None:
+                self._ids[(content_type, str(content_id))] = path
+            self._siblings.setdefault((content_type, self._parent(path)), []).append(path)
+
+    def file_path(self, path):
+        '''
+        Location of the exported dashboard, look or folder
+        '''
+
+        for paths in self._paths.values():
+            if path in paths:
+                return os.path.join(paths[path], *path.split('/'))
+
+        return None
+
+    def find(self, content_type, content_id, path):
+        '''
+        Path of the exported dashboard or look, matched by its id first and by its path second
+        returns None if it was not exported
+        '''
+
+        found = self._ids.get((content_type, str(content_id)))
+        if found is not None:
+            return found
+
+        return path if path in self._paths[content_type] else None
+
+    def find_folder(self, path):
+        path = path.strip('/')
+        return path if path in self._paths['folders'] else None
+
+    def candidates(self, content_type, path):
+        '''
+        Exported paths similar to the path, the closest first
+        '''
+
+        path = path.strip('/')
+        with self._lock:
+            paths = list(self._paths[content_type])
+            # content exported into the same folder is the most likely match
+            siblings = list(self._siblings.get((content_type, self._parent(path)), []))
+
+        return (difflib.get_close_matches(path, siblings, MAX_CANDIDATES, CANDIDATE_CUTOFF)
+                or difflib.get_close_matches(path, paths, MAX_CANDIDATES, CANDIDATE_CUTOFF))
+
+    @staticmethod
+    def _parent(path):
+        return path.rsplit('/', 1)[0] if '/' in path else ''
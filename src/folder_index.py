@@ -0,0 +1,117 @@
+'''
+Folder path index of a Looker environment.
+
+'''
+import logging
+
+
+class FolderPathIndex:
+    '''
+    Materialized full paths of the folders of one Looker environment.
+    Every path is resolved once, so looking up the path of a folder
+    is O(1) no matter how deep the folder tree is.
+    '''
+
+    def __init__(self, folders=()):
+        # folder id => (name, parent_id)
+        self._folders = {}
+        # folder id => memoized full path
+        self._paths = {}
+        # full path => folder id, built on the first lookup
+        self._ids = None
+
+        for folder in folders:
+            self.add(folder['id'], folder['name'], folder['parent_id'])
+
+    def __contains__(self, folder_id):
+        return folder_id in self._folders
+
+    def __iter__(self):
+        # folder ids in the order they were added
+        return iter(self._folders)
+
+    def __len__(self):
+        return len(self._folders)
+
+    def add(self, folder_id, name, parent_id):
+        self._folders[folder_id] = (name, parent_id)
+        self._ids = None
+
+    def name(self, folder_id):
+        return self._folders[folder_id][0]
+
+    def parent_id(self, folder_id):
+        return self._folders[folder_id][1]
+
+    def path(self, folder_id):
+        '''
+        Full path of the folder, e.g. Shared/Sales/Reports
+        '''
+
+        path = self._paths.get(folder_id)
+        if path is not None:
+            return path
+
+        # walking up until the root, an unknown parent or an already resolved ancestor
+        chain = []
+        visited = set()
+        current = folder_id
+        while current and current in self._folders and current not in self._paths:
+
+            if current in visited:
+                logging.warning(
+                    f'Folder [{current}] is part of a parent_id cycle, cutting the path at it.')
+                break
+
+            visited.add(current)
+            chain.append(current)
+            current = self._folders[current][1]
+
+        prefix = self._paths.get(current) if current in self._paths else None
+
+        # materializing the paths from the top ancestor down
+        for chain_id in reversed(chain):
+            name = self._folders[chain_id][0]
+            prefix = f'{prefix}/{name}' if prefix is not None else name
+            self._paths[chain_id] = prefix
+
+        return self._paths[folder_id]
+
+    def resolve(self, folder):
+        '''
+        Full path of a folder record embedded in a dashboard or a look
+        '''
+
+        if folder['id'] in self._folders:
+            return self.path(folder['id'])
+
+        # folder not listed in the environment, resolving from its parent
+        parent_id = folder.get('parent_id')
+        if parent_id in self._folders:
+            return f'{self.path(parent_id)}/{folder["name"]}'
+
+        return folder['name']
+
+    def ancestors(self, folder_id):
+        '''
+        Ids of the known ancestors of the folder, from its parent up
+        '''
+
+        visited = {folder_id}
+        current = self._folders[folder_id][1] if folder_id in self._folders else None
+        while current and current in self._folders and current not in visited:
+            visited.add(current)
+            yield current
+            current = self._folders[current][1]
+
+    def find(self, path):
+        '''
+        Id of the folder with the given full path, None if there is no such folder
+        '''
+
+        if self._ids is None:
+            self._ids = {}
+            for folder_id in self._folders:
+                self._ids.setdefault(self.path(folder_id), folder_id)
+
+        return self._ids.get(path.strip('/'))
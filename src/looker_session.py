@@ -0,0 +1,222 @@
+'''
+Authorized connection to a Looker environment.
+
+'''
+import email.utils
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_PATH = '/api/4.0/'
+
+DEFAULT_POOL_SIZE = 10
+
+# token is refreshed this many seconds before it expires
+TOKEN_EXPIRY_MARGIN = 60
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (10, 120)
+DEFAULT_MAX_RETRIES = 5
+
+# exponential backoff with full jitter, in seconds
+BACKOFF_BASE = 1
+BACKOFF_MAX = 60
+# longest Retry-After honoured, in seconds
+RETRY_AFTER_MAX = 300
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+THROTTLE_STATUSES = (429, 503)
+
+
+class LookerAuthorizationError(Exception):
+    pass
+
+
+class AdaptiveLimiter:
+    '''
+    Limit of the requests running at once against one environment
+    The limit is halved whenever the API throttles and raised by one
+    after a full window of successful requests, up to max_limit.
+    '''
+
+    def __init__(self, max_limit):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, throttled=False):
+        with self._condition:
+            self._in_flight -= 1
+
+            if throttled:
+                self._successes = 0
+                if self.limit > 1:
+                    self.limit = max(1, self.limit // 2)
+                    logging.debug(f'API is throttling, concurrency limited to {self.limit}.')
+
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self._successes = 0
+                    self.limit += 1
+
+            self._condition.notify_all()
+
+
+class LookerSession:
+    '''
+    One keep-alive HTTP session and one cached access token per environment.
+    The token is refreshed when it expires or when the API responds with 401.
+    Throttled (429), failed (5xx) and timed out requests are retried with backoff,
+    the number of concurrent requests adapts to throttling.
+    '''
+
+    def __init__(self, base_url, client_id, client_secret, pool_size=DEFAULT_POOL_SIZE, on_response=None,
+                 timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES):
+        self.base_url = base_url
+        self.api_url = urllib.parse.urljoin(base_url, API_PATH)
+
+        self.client_id = client_id
+        self._client_secret = client_secret
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        # e.g. metrics of the requests
+        if on_response:
+            self._session.hooks['response'].append(on_response)
+
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._limiter = AdaptiveLimiter(pool_size)
+
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def url(self, endpoint):
+        return urllib.parse.urljoin(self.api_url, endpoint.lstrip('/'))
+
+    def get_token(self):
+        '''
+        Cached access token, logging in only when there is no valid one
+        '''
+
+        with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at:
+                self._login()
+
+            return self._token
+
+    def invalidate_token(self, token):
+        with self._lock:
+            # other thread might have refreshed it already
+            if self._token == token:
+                self._token = None
+
+    def _login(self):
+
+        logging.debug(f'Logging into [{self.base_url}]')
+        res = self._request(
+            'POST', self.url('login'),
+            data={'client_id': self.client_id, 'client_secret': self._client_secret})
+
+        if res.status_code != 200:
+            raise LookerAuthorizationError(
+                f'Authorization into [{self.base_url}] failed: {res.status_code}')
+
+        body = res.json()
+        self._token = body['access_token']
+        self._expires_at = time.monotonic() + body.get('expires_in', 3600) - TOKEN_EXPIRY_MARGIN
+
+    def get(self, endpoint, params=None):
+        '''
+        Authorized GET request, retried once with a fresh token on 401
+        '''
+
+        token = self.get_token()
+        res = self._request('GET', self.url(endpoint), params=params, headers=self._headers(token))
+
+        if res.status_code == 401:
+            logging.debug(f'Access token for [{self.base_url}] expired, logging in again.')
+            self.invalidate_token(token)
+            res = self._request('GET', self.url(endpoint), params=params, headers=self._headers(self.get_token()))
+
+        return res
+
+    def _request(self, method, url, **kwargs):
+        '''
+        Request with a timeout, retried when throttled, failed with 5xx or timed out
+        The last response is returned when all retries are used up.
+        '''
+
+        for attempt in range(self.max_retries + 1):
+
+            res = None
+            self._limiter.acquire()
+            try:
+                res = self._session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if attempt == self.max_retries:
+                    raise
+                logging.warning(f'Request to [{url}] failed: {err}')
+            finally:
+                self._limiter.release(throttled=res is not None and res.status_code in THROTTLE_STATUSES)
+
+            if res is not None and (res.status_code not in RETRY_STATUSES or attempt == self.max_retries):
+                return res
+
+            delay = self._retry_delay(attempt, res)
+            logging.warning(
+                f'Retrying request to [{url}] in {delay:.1f}s '
+                f'({"status " + str(res.status_code) if res is not None else "no response"}, '
+                f'attempt {attempt + 1}/{self.max_retries}).')
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(attempt, res):
+        '''
+        Retry-After of the response if present, exponential backoff with full jitter otherwise
+        '''
+
+        retry_after = res.headers.get('Retry-After') if res is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                # HTTP date
+                try:
+                    retry_at = email.utils.parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+
+            if delay is not None:
+                return min(max(delay, 0), RETRY_AFTER_MAX)
+
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    @staticmethod
+    def _headers(token):
+        return {
+            'Authorization': 'Bearer {}'.format(token),
+            'Content-Type': 'application/json'
+        }
+
+    def close(self):
+        self._session.close()
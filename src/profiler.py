@@ -0,0 +1,185 @@
+'''
+Profiling of the run, enabled in debug mode.
+
+'''
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import tracemalloc
+
+TOP_N = 10
+# frames kept per allocation, more frames cost more memory and time
+TRACEMALLOC_FRAMES = 1
+
+# a snapshot walks all traced allocations, it is taken only after the run-level phases,
+# the other phases record the traced memory only
+SNAPSHOT_PHASES = ('get_folder_details', 'get_dashboard_details', 'get_dashboard_elements', 'get_looks_details',
+                   'export_fingerprints')
+
+# since Python 3.12 one profiler sees all threads
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class MemorySnapshot:
+    '''
+    Memory held at the end of a phase and the peak since the previous phase
+    With statistics, the largest allocations by line and their growth since the previous statistics.
+    '''
+
+    def __init__(self, label, current, peak, statistics=None, previous=None, top=TOP_N):
+        self.label = label
+        self.current = current
+        self.peak = peak
+        self.largest = []
+        self.growth = []
+
+        if statistics is not None:
+            self.largest = statistics[:top]
+            previous = previous or {}
+            growth = ((stat.size - previous.get(stat.traceback, 0), stat) for stat in statistics)
+            self.growth = sorted((item for item in growth if item[0] > 0), key=lambda item: -item[0])[:top]
+
+
+class RunProfiler:
+    '''
+    cProfile of the run, traced memory after every phase and the largest allocations
+    after the run-level phases
+    Threads started during the run are profiled too, their stats are merged with the main thread.
+    '''
+
+    def __init__(self, top=TOP_N):
+        self.top = top
+        self.snapshots = []
+
+        self._profiles = []
+        # traceback => size of the previous statistics
+        self._previous = {}
+        self._lock = threading.Lock()
+        # profile of the current thread
+        self._local = threading.local()
+
+    def start(self):
+
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+        if not PROFILES_ALL_THREADS:
+            threading.setprofile(self._profile_thread)
+        self._enable_profile()
+
+    def stop(self):
+
+        if not PROFILES_ALL_THREADS:
+            threading.setprofile(None)
+        for profile in self._profiles:
+            profile.disable()
+
+        self.snapshot('end', statistics=True)
+        tracemalloc.stop()
+
+    def phase_finished(self, phase):
+        '''
+        RunMetrics hook, called by the thread running the phase
+        '''
+
+        self.snapshot(f'{phase.name} {phase.label}'.strip(), statistics=phase.name in SNAPSHOT_PHASES)
+
+    def snapshot(self, label, statistics=False):
+
+        if not tracemalloc.is_tracing():
+            return
+
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+            if not statistics:
+                self.snapshots.append(MemorySnapshot(label, current, peak))
+                return
+
+            # statistics are pure Python, the profile is paused so it does not slow them down nor list them
+            profile = getattr(self._local, 'profile', None) or (self._profiles[0] if PROFILES_ALL_THREADS else None)
+            if profile:
+                profile.disable()
+            try:
+                stats = tracemalloc.take_snapshot().statistics('lineno')
+            finally:
+                if profile:
+                    profile.enable()
+
+            self.snapshots.append(MemorySnapshot(label, current, peak, stats, self._previous, self.top))
+            self._previous = {stat.traceback: stat.size for stat in stats}
+
+    def stats(self):
+        '''
+        Merged stats of all profiled threads
+        '''
+
+        stats = pstats.Stats(self._profiles[0])
+        for profile in self._profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def write_stats(self, path):
+        '''
+        Binary stats, readable by pstats, snakeviz etc.
+        '''
+
+        self.stats().dump_stats(path)
+
+    def write_report(self, path):
+        '''
+        Text report of the slowest functions and the largest allocations
+        '''
+
+        with open(path, 'w') as file:
+            for sort in ('cumulative', 'tottime'):
+                file.write(f'Functions by {sort} time\n')
+                file.write(self._stats_text(sort, self.top * 3))
+                file.write('\n')
+
+            for snapshot in self.snapshots:
+                file.write(f'Memory after {snapshot.label}: {snapshot.current / 2 ** 20:.1f} MB held, '
+                           f'{snapshot.peak / 2 ** 20:.1f} MB peak\n')
+                if snapshot.largest:
+                    file.write('  Largest allocations\n')
+                    file.writelines(f'    {stat}\n' for stat in snapshot.largest)
+                if snapshot.growth:
+                    file.write('  Growth since the previous statistics\n')
+                    file.writelines(f'    +{size / 1024:.1f} KiB {stat.traceback}\n' for size, stat in snapshot.growth)
+                file.write('\n')
+
+    def log_summary(self):
+
+        logging.info(
+            f'Profile, top {self.top} functions by cumulative time:\n{self._stats_text("cumulative", self.top)}')
+
+        for snapshot in self.snapshots:
+            if not snapshot.largest:
+                continue
+            largest = '\n'.join(f'    {stat}' for stat in snapshot.largest[:3])
+            logging.info(f'Memory after {snapshot.label}: {snapshot.current / 2 ** 20:.1f} MB held, '
+                         f'{snapshot.peak / 2 ** 20:.1f} MB peak\n{largest}')
+
+    def _stats_text(self, sort, limit):
+
+        output = io.StringIO()
+        stats = self.stats()
+        stats.stream = output
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def _enable_profile(self):
+
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        self._local.profile = profile
+        profile.enable()
+
+    def _profile_thread(self, frame, event, arg):
+        # first call in a new thread, replaced by the profile of the thread
+        sys.setprofile(None)
+        self._enable_profile()
@@ -0,0 +1,172 @@
+'''
+Run-scoped cache of the API listings.
+
+'''
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    '''
+    Records of the listings requested during the run, kept in memory
+    With cache_path and ttl the listings are also stored on disk and reused
+    by following runs for ttl seconds. Listings read once per run are not kept in memory.
+    A listing is stored only once it was read completely, concurrent readers
+    of the same listing wait for the first one instead of requesting it again.
+    Records are kept as tuples, the attribute names and the nested records
+    repeated across the listings (e.g. folders of the dashboards) are stored once.
+    '''
+
+    def __init__(self, cache_path=None, ttl=0):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._records = {}
+        self._loading = {}
+        self._shared = {}
+        self._lock = threading.Lock()
+
+    def records(self, key, load, keep=True):
+        '''
+        Streaming records of the listing
+        key - tuple: environment, endpoint and query parameters of the listing
+        load - callable: returns an iterable of the records when they are not cached
+        keep - bool: keeps the records in memory for the following readers in the run,
+               otherwise they are streamed through and stored on disk only
+        '''
+
+        if not keep:
+            yield from self._stream(key, load)
+            return
+
+        while True:
+            with self._lock:
+                records = self._records.get(key)
+                if records is None:
+                    loading = self._loading.get(key)
+                    if loading is None:
+                        loading = self._loading[key] = threading.Event()
+                        break
+                else:
+                    self.hits += 1
+
+            if records is not None:
+                yield from map(self._unpack, records)
+                return
+
+            # other thread is reading the same listing
+            loading.wait()
+
+        try:
+            packed = []
+            for record in self._stream(key, load):
+                packed.append(self._pack(record, nested=False))
+                yield record
+
+            with self._lock:
+                self._records[key] = packed
+
+        finally:
+            # waiting readers load it themselves if it was not read completely
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _stream(self, key, load):
+        '''
+        Records read from disk while fresh, loaded and stored on disk otherwise
+        '''
+
+        if self._is_fresh(key):
+            with self._lock:
+                self.hits += 1
+            yield from self._read(key)
+            return
+
+        with self._lock:
+            self.misses += 1
+        yield from self._write(key, load())
+
+    def _pack(self, value, nested=True):
+        if isinstance(value, dict):
+            packed = (self._share(tuple(value)),) + tuple(self._pack(item) for item in value.values())
+            # records are unique, only the nested ones are worth sharing
+            return self._share(packed) if nested else packed
+
+        if isinstance(value, list):
+            return [self._pack(item) for item in value]
+
+        return value
+
+    def _unpack(self, value):
+        if isinstance(value, tuple):
+            return dict(zip(value[0], map(self._unpack, value[1:])))
+
+        if isinstance(value, list):
+            return [self._unpack(item) for item in value]
+
+        return value
+
+    def _share(self, value):
+        # setdefault is atomic, readers of other listings may share at the same time
+        try:
+            return self._shared.setdefault(value, value)
+        except TypeError:
+            # nested lists are not hashable
+            return value
+
+    def _file_path(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.cache_path, f'{digest}.jsonl')
+
+    def _is_fresh(self, key):
+        if not self.cache_path or not self.ttl:
+            return False
+
+        try:
+            return time.time() - os.path.getmtime(self._file_path(key)) <= self.ttl
+        except OSError:
+            return False
+
+    def _read(self, key):
+        with open(self._file_path(key)) as file:
+            for line in file:
+                yield json.loads(line)
+
+    def _write(self, key, records):
+        '''
+        Passing the records through, stored on disk once all of them were read
+        '''
+
+        if not self.cache_path or not self.ttl:
+            yield from records
+            return
+
+        path = self._file_path(key)
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            file = open(f'{path}.tmp', 'w')
+        except OSError as err:
+            logging.warning(f'Response cache could not be stored: {err}')
+            yield from records
+            return
+
+        complete = False
+        try:
+            with file:
+                for record in records:
+                    file.write(json.dumps(record) + '\n')
+                    yield record
+            complete = True
+        finally:
+            # replaced at once, readers never see a partial file
+            if complete:
+                os.replace(f'{path}.tmp', path)
+            else:
+                os.remove(f'{path}.tmp')
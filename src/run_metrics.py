@@ -0,0 +1,128 @@
+'''
+Timing and request metrics of the run phases.
+
+'''
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_COLUMNS = ['run_id', 'sequence', 'phase', 'label', 'duration_s', 'requests', 'response_bytes', 'items']
+METRICS_PRIMARY_KEY = ['run_id', 'sequence']
+
+
+class Phase:
+    '''
+    Metrics of one phase, HTTP requests are added by the thread running it
+    '''
+
+    def __init__(self, name, label=''):
+        self.name = name
+        self.label = label
+        self.duration = 0.0
+        self.requests = 0
+        self.response_bytes = 0
+        self.items = 0
+
+
+class RunMetrics:
+    '''
+    Durations, HTTP requests, response bytes and item counts of the run phases
+    Responses are attributed to the innermost phase running in the same thread.
+    on_phase_end - callable: called with every finished phase, e.g. by the profiler
+    '''
+
+    def __init__(self, run_id='', on_phase_end=None):
+        self.run_id = run_id
+        self.on_phase_end = on_phase_end
+        self.phases = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name, label=''):
+        phase = Phase(name, label)
+        stack = self._stack()
+        stack.append(phase)
+        start = time.perf_counter()
+
+        try:
+            yield phase
+        finally:
+            phase.duration = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.phases.append(phase)
+            if self.on_phase_end:
+                self.on_phase_end(phase)
+
+    @contextmanager
+    def attach(self, phase):
+        '''
+        Counting the requests of the current thread into a phase running in another thread
+        '''
+
+        stack = self._stack()
+        stack.append(phase)
+        try:
+            yield phase
+        finally:
+            stack.pop()
+
+    def record(self, name, label='', duration=0.0, items=0):
+        '''
+        Adding a phase measured by the caller
+        '''
+
+        phase = Phase(name, label)
+        phase.duration = duration
+        phase.items = items
+        with self._lock:
+            self.phases.append(phase)
+
+    def record_response(self, response, *args, **kwargs):
+        '''
+        requests response hook
+        '''
+
+        stack = self._stack()
+        if stack:
+            # the phase may be attached to several threads
+            with self._lock:
+                stack[-1].requests += 1
+                stack[-1].response_bytes += len(response.content or b'')
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def rows(self):
+        for sequence, phase in enumerate(self.phases, start=1):
+            yield {
+                'run_id': self.run_id,
+                'sequence': sequence,
+                'phase': phase.name,
+                'label': phase.label,
+                'duration_s': round(phase.duration, 3),
+                'requests': phase.requests,
+                'response_bytes': phase.response_bytes,
+                'items': phase.items
+            }
+
+    def log_summary(self):
+
+        summary = {}
+        for phase in self.phases:
+            total = summary.setdefault(phase.name, [0, 0.0, 0, 0, 0])
+            total[0] += 1
+            total[1] += phase.duration
+            total[2] += phase.requests
+            total[3] += phase.response_bytes
+            total[4] += phase.items
+
+        logging.info('Run metrics:')
+        for name, (count, duration, requests, response_bytes, items) in summary.items():
+            logging.info(
+                f'  {name}: {count}x, {duration:.2f}s, {requests} requests, '
+                f'{response_bytes / 1024:.0f} kB, {items} items')
@@ -0,0 +1,54 @@
+'''
+Streaming writer of output tables.
+
+'''
+import csv
+import json
+import os
+
+
+class TableWriter:
+    '''
+    Writing rows of an output table as they are produced, together with its manifest
+    Columns are declared up front, attributes of the rows outside of them are ignored.
+    '''
+
+    def __init__(self, tables_out_path, filename, columns, incremental=False, primary_key=None):
+        self.path = os.path.join(tables_out_path, filename)
+        self.columns = columns
+        self.incremental = incremental
+        self.primary_key = primary_key or []
+        self.rows_written = 0
+
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction='ignore')
+        self._writer.writeheader()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+
+        # manifest is written only for complete tables
+        if exc_type is None:
+            self.write_manifest()
+
+    def writerow(self, row):
+        self._writer.writerow(row)
+        self.rows_written += 1
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def write_manifest(self):
+
+        manifest = {
+            'incremental': self.incremental,
+            'primary_key': self.primary_key
+        }
+        with open(f'{self.path}.manifest', 'w') as json_file:
+            json.dump(manifest, json_file)
@@ -0,0 +1,23 @@
+import unittest
+
+from catalog import ContentCatalog
+
+
+class TestContentCatalog(unittest.TestCase):
+
+    def test_entries_share_folder_and_keep_collisions(self):
+        catalog = ContentCatalog('Look')
+        first = catalog.add(1, 'Sales', '2', 'Shared/Team', '2024-01')
+        second = catalog.add(2, 'Sales', '2', 'Shared/Team', '2024-02')
+        catalog.add(3, 'Costs', '2', 'Shared/Team')
+
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(catalog.entries('Shared/Team/Sales'), [first, second])
+        self.assertIs(catalog.entry('Shared/Team/Sales'), second)
+        self.assertEqual(catalog.full_path('Shared/Team/Sales'), 'Shared/Team/Look_2_Sales.json')
+        self.assertIsNone(catalog.full_path('Shared/Sales'))
+        self.assertIs(first.folder_path, second.folder_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
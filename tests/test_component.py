@@ -3,12 +3,22 @@ Created on 12. 11. 2018
 
 @author: esner
 '''
+import csv
 import unittest
 import mock
 import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from pathlib import Path
 from freezegun import freeze_time
 
+from catalog import ContentCatalog
 from component import Component
+from deployer_backend import DeployCommandError
+from folder_index import FolderPathIndex
+from response_cache import ResponseCache
+from run_metrics import RunMetrics
 
 
 class TestComponent(unittest.TestCase):
@@ -22,6 +32,433 @@ class TestComponent(unittest.TestCase):
             comp = Component()
             comp.run()
 
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_get_records_pages_until_short_page(self, mock_configuration):
+        pages = [[{'id': 1}, {'id': 2}], [{'id': 3}]]
+        session = mock.Mock()
+        session.get.side_effect = [mock.Mock(status_code=200, json=mock.Mock(return_value=page)) for page in pages]
+
+        comp = Component.__new__(Component)
+        comp.response_cache = ResponseCache()
+        mock_configuration.return_value = mock.Mock(parameters={'page_size': 2})
+        records = list(comp.get_records(session, 'looks', 'id'))
+
+        self.assertEqual([r['id'] for r in records], [1, 2, 3])
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(session.get.call_args.args[0], 'looks/search')
+        self.assertEqual(session.get.call_args.kwargs['params']['offset'], 2)
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_import_content_keeps_value_order(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={'import_concurrency': 3})
+        to_params = {'type': 'folders', 'target_folder': 'Shared', 'value': ['A/X', 'B/Y', 'C/X', 'D/Z']}
+
+        comp = Component.__new__(Component)
+        imported = []
+        with mock.patch.object(Component, 'import_value', side_effect=lambda params, val, section: imported.append(val) or val):
+            log = comp.import_content(to_params)
+
+        self.assertEqual(log, to_params['value'])
+        # values sharing the destination folder X are imported in the configured order
+        self.assertLess(imported.index('A/X'), imported.index('C/X'))
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_import_content_starts_dashboards_after_their_head(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={'import_concurrency': 3})
+        values = ['Shared/A', 'Shared/B', 'Shared/C', 'Shared/D']
+        to_params = {'type': 'dashboards', 'target_folder': 'Shared', 'value': values}
+
+        # the three dashboards after the head are imported at the same time
+        tails = threading.Barrier(3, timeout=5)
+        events = []
+
+        def import_value(params, val, section):
+            events.append(f'start {val}')
+            if val != 'Shared/A':
+                tails.wait()
+            events.append(f'end {val}')
+            return val
+
+        comp = Component.__new__(Component)
+        with mock.patch.object(Component, 'import_value', side_effect=import_value):
+            log = comp.import_content(to_params)
+
+        self.assertEqual(log, values)
+        # the first dashboard creates the destination folder before the others start
+        self.assertEqual(events[:2], ['start Shared/A', 'end Shared/A'])
+
+    def test_log_rows_are_stamped_when_created(self):
+        comp = Component.__new__(Component)
+        comp.catalogs = {'from': {'dashboards': ContentCatalog('Dashboard')}}
+        to_params = {'base_url': 'https://looker.com', 'type': 'dashboards', 'target_folder': 'Shared'}
+
+        with freeze_time('2024-01-01 10:00:00'):
+            first = comp.import_value(to_params, 'Shared/A')
+        with freeze_time('2024-01-01 10:05:00'):
+            second = comp.import_value(to_params, 'Shared/B')
+
+        self.assertEqual((first['date'], first['status']), ('2024-01-01 10:00:00', 'FAILED'))
+        self.assertEqual(second['date'], '2024-01-01 10:05:00')
+
+    def test_pipelined_import_waits_only_for_its_folder(self):
+        comp = Component.__new__(Component)
+        comp.folder_indexes = {'from': FolderPathIndex([
+            {'id': '1', 'name': 'Shared', 'parent_id': None},
+            {'id': '2', 'name': 'Sales', 'parent_id': '1'},
+            {'id': '3', 'name': 'Reports', 'parent_id': '2'},
+            {'id': '4', 'name': 'Costs', 'parent_id': '1'},
+        ])}
+        dashboards = ContentCatalog('Dashboard')
+        dashboards.add('10', 'A', '3', 'Shared/Sales/Reports')
+        dashboards.add('11', 'B', '4', 'Shared/Costs')
+        comp.catalogs = {'from': {'dashboards': dashboards}}
+
+        sales, costs = Future(), Future()
+        sales.set_result(None)
+        costs.set_exception(DeployCommandError('timed out'))
+        comp.exports = {'2': sales, '4': costs}
+
+        # the export of Sales is done, the export of Costs failed
+        self.assertIsNone(comp.wait_for_export('dashboards', 'Shared/Sales/Reports/A'))
+        self.assertEqual(str(comp.wait_for_export('dashboards', 'Shared/Costs/B')), 'timed out')
+        self.assertEqual(comp.value_export_folder('folders', 'Shared/Sales/Reports', comp.exports), '2')
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_failed_export_archive_does_not_stop_deploy(self, mock_configuration):
+        to_params = {'base_url': 'https://to', 'type': 'dashboards', 'value': ['Shared/A'], 'target_folder': 'Shared'}
+        mock_configuration.return_value = mock.Mock(parameters={'export_cache': True, 'to': to_params})
+
+        def create_archive(export_path, archive_path):
+            Path(archive_path).write_text('partial')
+            raise OSError('No space left on device')
+
+        comp = Component.__new__(Component)
+        comp.metrics = RunMetrics()
+        comp.state = {}
+        comp._state_lock = threading.Lock()
+        row = {'date': '2024-01-01 10:00:00', 'type': 'dashboards', 'value': 'Shared/A', 'status': 'DEPLOYED',
+               'issue': ''}
+
+        with tempfile.TemporaryDirectory() as folder:
+            archive = mock.Mock(full_path=os.path.join(folder, 'export.tar.gz'))
+            os.makedirs(os.path.join(folder, 'exports', '2'))
+            with mock.patch.object(Component, 'tables_out_path', new_callable=mock.PropertyMock,
+                                   return_value=folder), \
+                    mock.patch('component.create_backend'), \
+                    mock.patch('export_cache.create_archive', create_archive), \
+                    mock.patch.multiple(Component, create_looker_ini=mock.DEFAULT, construct_arg=mock.DEFAULT,
+                                        get_export_folders=mock.Mock(return_value=['2']),
+                                        export_fingerprints=mock.Mock(return_value={'2': 'f' * 64}),
+                                        restore_export=mock.Mock(return_value=False),
+                                        export_folder_path=lambda self, folder_id: os.path.join(
+                                            folder, 'exports', folder_id),
+                                        create_out_file_definition=mock.Mock(return_value=archive),
+                                        write_filedef_manifest=mock.DEFAULT,
+                                        import_content=mock.Mock(return_value=[row])):
+                with self.assertLogs(level='WARNING') as logs:
+                    comp.deploy({'base_url': 'https://from', 'folder_id': '2'}, [('to', to_params)])
+
+            with open(os.path.join(folder, 'log.csv')) as file:
+                rows = list(csv.DictReader(file))
+            self.assertFalse(os.path.exists(archive.full_path))
+
+        self.assertEqual([(r['value'], r['status']) for r in rows], [('Shared/A', 'DEPLOYED')])
+        self.assertIn('could not be archived', logs.output[0])
+        # the next run exports the folder again
+        self.assertEqual(comp.state.get('export_cache', {}), {})
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_targeted_export_drops_nested_and_foreign_folders(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={'export_mode': 'targeted'})
+
+        comp = Component.__new__(Component)
+        comp.folder_indexes = {'from': FolderPathIndex([
+            {'id': '1', 'name': 'Shared', 'parent_id': None},
+            {'id': '2', 'name': 'Sales', 'parent_id': '1'},
+            {'id': '3', 'name': 'Reports', 'parent_id': '2'},
+            {'id': '4', 'name': 'Other', 'parent_id': None},
+        ])}
+        dashboards = ContentCatalog('Dashboard')
+        dashboards.add('10', 'A', '2', 'Shared/Sales')
+        dashboards.add('11', 'B', '3', 'Shared/Sales/Reports')
+        dashboards.add('12', 'C', '4', 'Other')
+        comp.catalogs = {'from': {'dashboards': dashboards}}
+        values = ['Shared/Sales/A', 'Shared/Sales/Reports/B', 'Other/C']
+
+        self.assertEqual(comp.get_export_folders({'folder_id': '1'}, 'dashboards', values), ['2'])
+        # folders nested in other configured folders are exported with them
+        self.assertEqual(comp.get_export_folders({'folder_id': ['4', '1', '3']}, 'dashboards', values), ['2', '4'])
+
+        # of dashboards sharing a path, the folder of the imported one is exported
+        dashboards.add('13', 'A', '3', 'Shared/Sales')
+        self.assertEqual(comp.get_export_folders({'folder_id': '1'}, 'dashboards', ['Shared/Sales/A']), ['3'])
+        self.assertEqual(comp.value_export_folder('dashboards', 'Shared/Sales/A', ['3']), '3')
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_content_is_hashed_only_to_skip_unchanged(self, mock_configuration):
+        to_params = {'base_url': 'https://to', 'type': 'dashboards', 'target_folder': 'Shared'}
+        comp = Component.__new__(Component)
+        comp.metrics = RunMetrics()
+        comp.state = {}
+        comp._state_lock = threading.Lock()
+        comp.backend = mock.Mock()
+        comp.catalogs = {'from': {'dashboards': ContentCatalog('Dashboard')}}
+        comp.catalogs['from']['dashboards'].add('1', 'A', '1', 'Shared')
+        comp.export_index = mock.Mock(find=mock.Mock(return_value='Shared/Dashboard_1_A.json'))
+
+        with mock.patch.multiple(Component, construct_arg=mock.DEFAULT, wait_for_export=mock.Mock(return_value=None),
+                                 export_file_path=mock.DEFAULT, content_hash=mock.Mock(return_value='hash')):
+            mock_configuration.return_value = mock.Mock(parameters={})
+            self.assertEqual(comp.import_value(to_params, 'Shared/A')['status'], 'DEPLOYED')
+            Component.content_hash.assert_not_called()
+            self.assertEqual(comp.state, {})
+
+            mock_configuration.return_value = mock.Mock(parameters={'skip_unchanged': True})
+            self.assertEqual(comp.import_value(to_params, 'Shared/A')['status'], 'DEPLOYED')
+            self.assertEqual(comp.import_value(to_params, 'Shared/A')['status'], 'UNCHANGED')
+
+        self.assertEqual(comp.backend.run.call_count, 2)
+
+    def test_content_hash_of_folder_follows_file_content(self):
+        with tempfile.TemporaryDirectory() as folder:
+            Path(folder, 'Dashboard_1_A.json').write_text('{"title": "A"}')
+            first = Component.content_hash(folder)
+            self.assertEqual(Component.content_hash(folder), first)
+
+            Path(folder, 'Dashboard_1_A.json').write_text('{"title": "B"}')
+            self.assertNotEqual(Component.content_hash(folder), first)
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_changed_records_stop_at_watermark(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={'page_size': 2})
+        updated = [{'id': 3, 'updated_at': '2024-03'}, {'id': 2, 'updated_at': '2024-02'}]
+        deleted = [{'id': 1, 'deleted_at': '2024-01'}]
+        session = mock.Mock()
+        session.get.side_effect = [mock.Mock(status_code=200, json=mock.Mock(return_value=page))
+                                   for page in (updated, deleted)]
+
+        comp = Component.__new__(Component)
+        comp.response_cache = ResponseCache()
+        records = list(comp.get_changed_records(session, 'looks', 'id', '2024-02-15'))
+
+        # the first page already reaches the watermark, second page is never requested
+        self.assertEqual([r['id'] for r in records], [3])
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(session.get.call_args.kwargs['params']['deleted'], 'true')
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_content_of_moved_folders_is_fetched_again(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={'page_size': 10})
+        comp = Component.__new__(Component)
+        comp.response_cache = ResponseCache()
+        comp._state_lock = threading.Lock()
+        comp.state = {}
+
+        before = FolderPathIndex([{'id': '1', 'name': 'Shared', 'parent_id': None},
+                                  {'id': '2', 'name': 'Sales', 'parent_id': '1'},
+                                  {'id': '3', 'name': 'EU', 'parent_id': '2'},
+                                  {'id': '4', 'name': 'HR', 'parent_id': '1'}])
+        self.assertEqual(comp.update_folder_paths('url', before), set())
+
+        # Sales renamed, its subfolder moves with it
+        after = FolderPathIndex([{'id': '1', 'name': 'Shared', 'parent_id': None},
+                                 {'id': '2', 'name': 'Revenue', 'parent_id': '1'},
+                                 {'id': '3', 'name': 'EU', 'parent_id': '2'},
+                                 {'id': '4', 'name': 'HR', 'parent_id': '1'}])
+        moved = comp.update_folder_paths('url', after)
+        self.assertEqual(moved, {'2', '3'})
+
+        updated = [{'id': 7, 'updated_at': '2024-03', 'folder': {'id': '3'}}]
+        listing = [{'id': 7, 'updated_at': '2024-03', 'folder': {'id': '3'}},
+                   {'id': 8, 'updated_at': '2024-01', 'folder': {'id': '2'}},
+                   {'id': 9, 'updated_at': '2024-01', 'folder': {'id': '4'}}]
+        session = mock.Mock()
+        session.get.side_effect = [mock.Mock(status_code=200, json=mock.Mock(return_value=page))
+                                   for page in (updated, [], listing)]
+
+        records = comp.get_changed_records(session, 'dashboards', 'id', '2024-02', lambda: moved)
+        self.assertEqual([r['id'] for r in records], [7, 8])
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_export_fingerprints_list_only_exported_trees(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={'page_size': 10})
+        folders = [{'id': '1', 'name': 'Shared', 'parent_id': None}, {'id': '2', 'name': 'Sales', 'parent_id': '1'},
+                   {'id': '3', 'name': 'EU', 'parent_id': '2'}, {'id': '4', 'name': 'HR', 'parent_id': '1'}]
+        content = {'dashboards': [{'id': '7', 'folder_id': '3', 'updated_at': '2024-01'},
+                                  {'id': '8', 'folder_id': '4', 'updated_at': '2024-01'}],
+                   'looks': [{'id': 9, 'folder_id': '2', 'updated_at': '2024-02'}]}
+
+        def get(endpoint, params):
+            records = folders if endpoint == 'folders/search' else content[endpoint[:-len('/search')]]
+            for attribute in ('parent_id', 'folder_id'):
+                if attribute in params:
+                    records = [record for record in records if record[attribute] == params[attribute]]
+            return mock.Mock(status_code=200, json=mock.Mock(return_value=records))
+
+        comp = Component.__new__(Component)
+        comp.response_cache = ResponseCache()
+        comp.metrics = RunMetrics()
+        comp.folder_indexes = {'from': FolderPathIndex(folders[:2])}
+        session = mock.Mock(base_url='url', client_id='client', get=mock.Mock(side_effect=get))
+
+        with mock.patch.object(Component, 'get_session', return_value=session):
+            walked = comp.export_fingerprints({}, ['2'])
+            requests = [(call.args[0], call.kwargs['params'].get('parent_id') or call.kwargs['params'].get('folder_id'))
+                        for call in session.get.call_args_list]
+            # the folders of HR are never requested
+            self.assertEqual(sorted(requests), [('dashboards/search', '2'), ('dashboards/search', '3'),
+                                                ('folders/search', '2'), ('folders/search', '3'),
+                                                ('looks/search', '2'), ('looks/search', '3')])
+            self.assertEqual(comp.metrics.phases[-1].items, 2)
+
+            with mock.patch('component.FINGERPRINT_FOLDER_LIMIT', 0):
+                listed = comp.export_fingerprints({}, ['2'])
+            content['looks'][0]['updated_at'] = '2024-03'
+            changed = comp.export_fingerprints({}, ['2'])
+
+        self.assertEqual(walked, listed)
+        self.assertNotEqual(walked, changed)
+
+    def test_plan_marks_status_and_collisions(self):
+        comp = Component.__new__(Component)
+        comp.catalogs = {input_type: {'dashboards': ContentCatalog('Dashboard'), 'looks': ContentCatalog('Look')}
+                         for input_type in ('from', 'to')}
+        for entry in (('1', 'A', '2024-02'), ('2', 'B', '2024-01'), ('3', 'C', '2024-01'), ('4', 'C', '2024-03')):
+            comp.catalogs['from']['dashboards'].add(entry[0], entry[1], '1', 'Shared', entry[2])
+        for entry in (('7', 'A', '2024-01'), ('8', 'B', '2024-01'), ('9', 'D', '2024-01')):
+            comp.catalogs['to']['dashboards'].add(entry[0], entry[1], '5', 'Shared', entry[2])
+
+        with tempfile.TemporaryDirectory() as folder:
+            with mock.patch.object(Component, 'tables_out_path', new_callable=mock.PropertyMock,
+                                   return_value=folder):
+                comp.plan()
+
+            with open(os.path.join(folder, 'plan.csv')) as file:
+                rows = {row['ui_path']: row for row in csv.DictReader(file)}
+
+        self.assertEqual({path: row['status'] for path, row in rows.items()},
+                         {'Shared/A': 'newer_in_from', 'Shared/B': 'not_newer_in_from', 'Shared/C': 'new',
+                          'Shared/D': 'missing'})
+        self.assertEqual(rows['Shared/C']['from_id'], '3;4')
+        self.assertEqual(rows['Shared/C']['collision'], 'from')
+        self.assertEqual(rows['Shared/A']['collision'], '')
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_dashboard_elements_share_queries(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={
+            'fetch_dashboard_elements': True, 'element_concurrency': 2})
+        query = {'id': '5', 'model': 'sales', 'view': 'orders', 'fields': ['orders.count']}
+        responses = {
+            '1': [{'id': '11', 'dashboard_id': '1', 'type': 'vis', 'query': query},
+                  {'id': '12', 'dashboard_id': '1', 'type': 'text'}],
+            '2': [{'id': '21', 'dashboard_id': '2', 'type': 'vis', 'look_id': '4',
+                   'look': {'query_id': '5', 'query': query}}],
+        }
+
+        def get(endpoint, params=None):
+            dashboard_id = endpoint.split('/')[1]
+            if dashboard_id not in responses:
+                return mock.Mock(status_code=404)
+            return mock.Mock(status_code=200, json=mock.Mock(return_value=responses[dashboard_id]))
+
+        comp = Component.__new__(Component)
+        comp.fetch_elements = True
+        comp.incremental_fetch = False
+        comp.metrics = RunMetrics()
+        comp.catalogs = {'from': {'dashboards': ContentCatalog('Dashboard')}}
+        for dashboard_id in ('1', '2', '3'):
+            comp.catalogs['from']['dashboards'].add(dashboard_id, f'D{dashboard_id}', '1', 'Shared')
+        session = mock.Mock(base_url='url', get=mock.Mock(side_effect=get))
+
+        with tempfile.TemporaryDirectory() as folder:
+            with mock.patch.object(Component, 'tables_out_path', new_callable=mock.PropertyMock,
+                                   return_value=folder):
+                comp._fetch_dashboard_elements(session, 'from')
+
+            with open(os.path.join(folder, 'from_dashboard_elements.csv')) as file:
+                elements = {row['id']: row for row in csv.DictReader(file)}
+            with open(os.path.join(folder, 'from_queries.csv')) as file:
+                queries = list(csv.DictReader(file))
+
+        # dashboard 3 no longer exists
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(sorted(elements), ['11', '12', '21'])
+        self.assertEqual((elements['21']['query_id'], elements['12']['query_id']), ('5', ''))
+        self.assertEqual([(row['id'], row['model'], row['view'], row['fields']) for row in queries],
+                         [('5', 'sales', 'orders', '["orders.count"]')])
+        self.assertEqual(comp.metrics.phases[-1].items, 3)
+
+    @mock.patch.object(Component, 'configuration', new_callable=mock.PropertyMock)
+    def test_resolve_content_matches_title_and_folder_path(self, mock_configuration):
+        mock_configuration.return_value = mock.Mock(parameters={'page_size': 100})
+        responses = {
+            'dashboards/search': [
+                {'id': '7', 'title': 'sales', 'folder': {'id': '3', 'name': 'Other', 'parent_id': '1'}},
+                {'id': '8', 'title': 'Sales', 'folder': {'id': '2', 'name': 'Team', 'parent_id': '1'}},
+                {'id': '9', 'title': 'Sales', 'folder': {'id': '3', 'name': 'Other', 'parent_id': '1'}}
+            ],
+            'folders/2/ancestors': [{'id': '1', 'name': 'Shared', 'parent_id': None}]
+        }
+        session = mock.Mock(base_url='url', client_id='client')
+        session.get.side_effect = lambda endpoint, params: mock.Mock(
+            status_code=200, json=mock.Mock(return_value=responses[endpoint]))
+
+        comp = Component.__new__(Component)
+        comp.response_cache = ResponseCache()
+        comp.catalogs = {'from': {'dashboards': ContentCatalog('Dashboard')}}
+        folder_index = FolderPathIndex()
+
+        self.assertTrue(comp._resolve_content(session, folder_index, 'dashboards', 'Shared/Team/Sales'))
+        self.assertEqual(comp.catalogs['from']['dashboards'].full_path('Shared/Team/Sales'),
+                         'Shared/Team/Dashboard_8_Sales.json')
+        # ancestors of the second folder are already known
+        self.assertEqual([call.args[0] for call in session.get.call_args_list],
+                         ['dashboards/search', 'folders/2/ancestors'])
+
+    def test_resolve_reuses_validated_folders(self):
+        session = mock.Mock(base_url='url', client_id='client')
+        session.get.return_value = mock.Mock(
+            status_code=200, json=mock.Mock(return_value=[{'id': '1', 'name': 'Shared', 'parent_id': None}]))
+
+        comp = Component.__new__(Component)
+        comp.metrics = RunMetrics()
+        comp.folder_indexes = {}
+        comp.from_folders = {'12': {'id': '12', 'name': 'Sales', 'parent_id': '1'}}
+
+        with mock.patch.object(Component, 'get_session', return_value=session):
+            comp.resolve_deploy_content({'folder_id': '12'}, 'folders', [])
+
+        self.assertEqual(comp.folder_indexes['from'].path('12'), 'Shared/Sales')
+        self.assertEqual([call.args[0] for call in session.get.call_args_list], ['folders/12/ancestors'])
+
+    def test_from_folder_failures_are_told_apart(self):
+        comp = Component.__new__(Component)
+        comp.metrics = RunMetrics()
+        session = mock.Mock(url=mock.Mock(side_effect=lambda endpoint: f'https://from/api/4.0/{endpoint}'))
+
+        for status_code, message in ((404, 'is not one of the available folder ids'),
+                                     (403, 'failed: 403 - Forbidden')):
+            session.get.return_value = mock.Mock(status_code=status_code, text='Forbidden')
+            with mock.patch.object(Component, 'get_session', return_value=session), \
+                    self.assertLogs(level='ERROR') as logs, self.assertRaises(SystemExit):
+                comp.get_from_folder({}, 12)
+            self.assertIn(message, logs.output[0])
+
+    def test_targets_get_own_looker_ini_sections(self):
+        params = {'to': [{'base_url': 'https://a'}, {'base_url': 'https://b', 'name': 'prod'}]}
+        targets = Component.get_targets(params)
+
+        self.assertEqual([section for section, _ in targets], ['to_1', 'to_2'])
+        self.assertEqual([Component.target_name(to_params) for _, to_params in targets], ['https://a', 'prod'])
+        self.assertEqual(Component.get_targets({'to': {'base_url': 'https://a'}}), [('to', {'base_url': 'https://a'})])
+
+    def test_single_target_keeps_log_table(self):
+        self.assertEqual(Component.log_table({'base_url': 'https://a'}),
+                         ('log.csv', ['date', 'type', 'value', 'status', 'issue'], ['date', 'type', 'value']))
+        filename, columns, primary_key = Component.log_table([{'base_url': 'https://a'}])
+        self.assertEqual((filename, primary_key), ('target_log.csv', ['date', 'target', 'type', 'value']))
+        self.assertIn('target', columns)
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,77 @@
+import argparse
+import importlib.util
+import logging
+import sys
+import unittest
+import mock
+
+from deployer_backend import DeployCommandError, InProcessBackend, SubprocessBackend, create_backend
+
+HAS_LOOKER_DEPLOYER = importlib.util.find_spec('looker_deployer') is not None
+
+IMPORT_ARG = ['ldeploy', 'content', 'import', '--ini', '/data/looker.ini', '--env', 'to',
+              '--dashboards', '/data/exports/Shared/Sales/Dashboard_7_Revenue.json', '--target-folder', 'Shared/Sales']
+
+
+def failing_import(args):
+    logging.getLogger('looker_deployer.commands.deploy_content').error(f'Folder {args.target_folder} not found')
+    sys.exit(1)
+
+
+class TestDeployerBackend(unittest.TestCase):
+
+    def test_subprocess_failure_carries_stderr(self):
+        backend = SubprocessBackend()
+        arg = [sys.executable, '-c', 'import sys; sys.stderr.write("folder not found"); sys.exit(1)']
+
+        with self.assertRaisesRegex(DeployCommandError, 'folder not found'):
+            backend.run(arg)
+
+    def test_falls_back_to_subprocess(self):
+        with mock.patch.dict(sys.modules, {'looker_deployer': None}):
+            with self.assertLogs(level='WARNING'):
+                backend = create_backend('in_process')
+
+        self.assertIsInstance(backend, SubprocessBackend)
+
+    def test_in_process_failure_carries_library_log(self):
+        parser = argparse.ArgumentParser(prog='ldeploy')
+        content = parser.add_subparsers().add_parser('content').add_subparsers()
+        import_parser = content.add_parser('import')
+        for option in ('--ini', '--env', '--dashboards', '--target-folder'):
+            import_parser.add_argument(option)
+        import_parser.set_defaults(func=failing_import)
+
+        backend = InProcessBackend.__new__(InProcessBackend)
+        backend._parser = parser
+        backend._lock = mock.MagicMock()
+
+        with self.assertRaisesRegex(DeployCommandError, 'ERROR Folder Shared/Sales not found'):
+            backend.run(IMPORT_ARG)
+        backend._lock.__enter__.assert_called_once()
+
+    @unittest.skipUnless(HAS_LOOKER_DEPLOYER, 'looker_deployer is not installed')
+    def test_in_process_runs_library_parser(self):
+        from looker_deployer.commands import deploy_content
+
+        clients = []
+
+        def import_content(args):
+            clients.append(deploy_content.get_client(args.ini, args.env))
+            logging.getLogger('looker_deployer.commands.deploy_content').warning(f'Importing {args.dashboards}')
+
+        get_client = mock.Mock(side_effect=lambda ini, env: object())
+        with mock.patch.object(deploy_content, 'main', import_content), \
+                mock.patch.object(deploy_content, 'get_client', get_client):
+            backend = InProcessBackend()
+            output = backend.run(IMPORT_ARG)
+            backend.run(IMPORT_ARG)
+
+        self.assertIn('Dashboard_7_Revenue.json', output)
+        # one client per (ini, env) for all commands
+        get_client.assert_called_once_with('/data/looker.ini', 'to')
+        self.assertIs(clients[0], clients[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from export_cache import FolderFingerprint, archive_name, cache_key, create_archive, restore_archive
+
+
+class TestExportCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.export_path = os.path.join(self.tmp.name, 'exports', '12')
+        sales = Path(self.export_path, 'Shared', 'Sales')
+        os.makedirs(sales)
+        Path(sales, 'Dashboard_7_Revenue.json').write_text('{"id": 7}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_archive_round_trip(self):
+        archive_path = os.path.join(self.tmp.name, 'export.tar.gz')
+        create_archive(self.export_path, archive_path)
+
+        restored = os.path.join(self.tmp.name, 'restored')
+        restore_archive(archive_path, restored)
+
+        self.assertEqual(Path(restored, 'Shared', 'Sales', 'Dashboard_7_Revenue.json').read_text(), '{"id": 7}')
+
+    def test_members_outside_of_export_are_refused(self):
+        archive_path = os.path.join(self.tmp.name, 'evil.tar.gz')
+        with tarfile.open(archive_path, 'w:gz') as archive:
+            archive.add(os.path.join(self.export_path, 'Shared'), arcname='../Shared')
+
+        with self.assertRaises(tarfile.TarError):
+            restore_archive(archive_path, os.path.join(self.tmp.name, 'restored'))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'Shared')))
+
+    def test_fingerprint_changes_with_content(self):
+        def fingerprint(updated_at):
+            folder_fingerprint = FolderFingerprint()
+            folder_fingerprint.add('folders', '12', 'Sales', '1')
+            folder_fingerprint.add('dashboards', '7', updated_at)
+            return folder_fingerprint.hexdigest()
+
+        self.assertEqual(fingerprint('2024-01-01'), fingerprint('2024-01-01'))
+
+        reordered = FolderFingerprint()
+        reordered.add('dashboards', '7', '2024-01-01')
+        reordered.add('folders', '12', 'Sales', '1')
+        self.assertEqual(reordered.hexdigest(), fingerprint('2024-01-01'))
+        self.assertNotEqual(fingerprint('2024-01-01'), fingerprint('2024-01-02'))
+
+        key = cache_key('https://looker.com', '12')
+        self.assertNotEqual(key, cache_key('https://staging.looker.com', '12'))
+        self.assertEqual(archive_name(key, fingerprint('2024-01-01')),
+                         f'looker_deployer_export_{key}_{fingerprint("2024-01-01")[:16]}.tar.gz')
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from export_index import ExportIndex
+
+
+class TestExportIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.exports = tempfile.TemporaryDirectory()
+        sales = Path(self.exports.name, 'Shared', 'Sales')
+        os.makedirs(sales)
+        Path(sales, 'Dashboard_7_Revenue 2024.json').write_text('{}')
+        Path(sales, 'Look_3_Costs.json').write_text('{}')
+        Path(sales, 'notes.txt').write_text('')
+        self.index = ExportIndex.scan([self.exports.name])
+
+    def tearDown(self):
+        self.exports.cleanup()
+
+    def test_dashboards_are_matched_by_id_before_path(self):
+        self.assertEqual(len(self.index), 2)
+        # title changed since the catalog was fetched
+        self.assertEqual(self.index.find('dashboards', 7, 'Shared/Sales/Dashboard_7_Revenue.json'),
+                         'Shared/Sales/Dashboard_7_Revenue 2024.json')
+        self.assertEqual(self.index.find('looks', 9, 'Shared/Sales/Look_3_Costs.json'), 'Shared/Sales/Look_3_Costs.json')
+        self.assertIsNone(self.index.find('looks', 9, 'Shared/Look_9_Costs.json'))
+        self.assertEqual(self.index.find_folder('/Shared/Sales/'), 'Shared/Sales')
+
+    def test_near_misses_are_reported(self):
+        self.assertEqual(self.index.candidates('dashboards', 'Shared/Sales/Dashboard_8_Revenue 2024.json'),
+                         ['Shared/Sales/Dashboard_7_Revenue 2024.json'])
+        self.assertEqual(self.index.candidates('folders', 'Shared/Sale'), ['Shared/Sales'])
+        self.assertEqual(self.index.candidates('looks', 'Other/Look_1_Unrelated.json'), [])
+
+    def test_export_directories_are_merged(self):
+        with tempfile.TemporaryDirectory() as other:
+            os.makedirs(Path(other, 'Shared', 'Costs'))
+            Path(other, 'Shared', 'Costs', 'Look_4_Budget.json').write_text('{}')
+            index = ExportIndex.scan([self.exports.name, other])
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.file_path('Shared/Costs/Look_4_Budget.json'),
+                         os.path.join(other, 'Shared', 'Costs', 'Look_4_Budget.json'))
+        self.assertEqual(index.file_path('Shared/Sales'), os.path.join(self.exports.name, 'Shared', 'Sales'))
+
+
+if __name__ == "__main__":
+    unittest.main()
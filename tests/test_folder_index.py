@@ -0,0 +1,44 @@
+import unittest
+
+from folder_index import FolderPathIndex
+
+
+class TestFolderPathIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FolderPathIndex([
+            {'id': '1', 'name': 'Shared', 'parent_id': None},
+            {'id': '2', 'name': 'Sales', 'parent_id': '1'},
+            {'id': '3', 'name': 'Reports', 'parent_id': '2'},
+            {'id': '4', 'name': 'Orphan', 'parent_id': '99'},
+        ])
+
+    def test_path_resolves_ancestors(self):
+        self.assertEqual(self.index.path('3'), 'Shared/Sales/Reports')
+        self.assertEqual(self.index.path('2'), 'Shared/Sales')
+
+    def test_unknown_parent_ends_path(self):
+        self.assertEqual(self.index.path('4'), 'Orphan')
+
+    def test_resolve_folder_not_in_index(self):
+        folder = {'id': '5', 'name': 'Personal', 'parent_id': '2'}
+        self.assertEqual(self.index.resolve(folder), 'Shared/Sales/Personal')
+
+    def test_find_by_path(self):
+        self.assertEqual(self.index.find('/Shared/Sales/'), '2')
+        self.assertIsNone(self.index.find('Shared/Missing'))
+
+    def test_ancestors(self):
+        self.assertEqual(list(self.index.ancestors('3')), ['2', '1'])
+
+    def test_cycle_is_cut(self):
+        index = FolderPathIndex([
+            {'id': 'a', 'name': 'A', 'parent_id': 'b'},
+            {'id': 'b', 'name': 'B', 'parent_id': 'a'},
+        ])
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(index.path('a'), 'B/A')
+
+
+if __name__ == "__main__":
+    unittest.main()
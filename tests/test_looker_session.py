@@ -0,0 +1,70 @@
+import unittest
+import mock
+
+from looker_session import LookerAuthorizationError, LookerSession
+
+
+def response(status_code, body=None, headers=None):
+    return mock.Mock(status_code=status_code, json=mock.Mock(return_value=body), headers=headers or {})
+
+
+class TestLookerSession(unittest.TestCase):
+
+    def setUp(self):
+        self.session = LookerSession('https://looker.example.com', 'id', 'secret')
+        self.http = mock.Mock()
+        self.session._session = self.http
+
+    def test_token_is_cached(self):
+        self.http.request.return_value = response(200, {'access_token': 'a', 'expires_in': 3600})
+
+        self.assertEqual(self.session.get_token(), 'a')
+        self.assertEqual(self.session.get_token(), 'a')
+        self.assertEqual(self.http.request.call_count, 1)
+        self.assertEqual(self.http.request.call_args.args[:2], ('POST', 'https://looker.example.com/api/4.0/login'))
+
+    def test_unauthorized_response_refreshes_token(self):
+        self.http.request.side_effect = [
+            response(200, {'access_token': 'a', 'expires_in': 3600}),
+            response(401),
+            response(200, {'access_token': 'b', 'expires_in': 3600}),
+            response(200, []),
+        ]
+
+        res = self.session.get('folders')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.http.request.call_args.kwargs['headers']['Authorization'], 'Bearer b')
+
+    def test_failed_login_raises(self):
+        self.http.request.return_value = response(403)
+
+        with self.assertRaises(LookerAuthorizationError):
+            self.session.get_token()
+
+    @mock.patch('looker_session.time.sleep')
+    def test_throttled_request_waits_retry_after(self, mock_sleep):
+        self.session._token = 'a'
+        self.session._expires_at = float('inf')
+        self.http.request.side_effect = [response(429, headers={'Retry-After': '7'}), response(200, [])]
+
+        res = self.session.get('looks')
+
+        self.assertEqual(res.status_code, 200)
+        mock_sleep.assert_called_once_with(7.0)
+        self.assertEqual(self.session._limiter.limit, 5)
+
+    @mock.patch('looker_session.time.sleep')
+    def test_retries_are_limited(self, mock_sleep):
+        self.session._token = 'a'
+        self.session._expires_at = float('inf')
+        self.http.request.return_value = response(502)
+
+        res = self.session.get('looks')
+
+        self.assertEqual(res.status_code, 502)
+        self.assertEqual(self.http.request.call_count, self.session.max_retries + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import pstats
+import tempfile
+import threading
+import unittest
+
+from profiler import RunProfiler
+from run_metrics import RunMetrics
+
+
+def build_catalog(size):
+    return [{'id': str(item_id), 'title': f'Dashboard {item_id}'} for item_id in range(size)]
+
+
+class TestRunProfiler(unittest.TestCase):
+
+    def test_profile_covers_phases_and_threads(self):
+        profiler = RunProfiler(top=5)
+        metrics = RunMetrics(on_phase_end=profiler.phase_finished)
+
+        profiler.start()
+        try:
+            with metrics.phase('get_dashboard_details', 'from'):
+                catalog = build_catalog(10000)
+            with metrics.phase('import', 'Shared/A'):
+                worker = threading.Thread(target=build_catalog, args=(10,))
+                worker.start()
+                worker.join()
+        finally:
+            profiler.stop()
+
+        labels = [snapshot.label for snapshot in profiler.snapshots]
+        self.assertEqual(labels, ['get_dashboard_details from', 'import Shared/A', 'end'])
+        # allocations are listed only after the run-level phases and at the end
+        self.assertTrue(profiler.snapshots[0].largest)
+        self.assertFalse(profiler.snapshots[1].largest)
+        self.assertEqual(len(catalog), 10000)
+
+        with tempfile.TemporaryDirectory() as out_files:
+            stats_path = os.path.join(out_files, 'profile.prof')
+            report_path = os.path.join(out_files, 'profile.txt')
+            profiler.write_stats(stats_path)
+            profiler.write_report(report_path)
+
+            calls = {function: stat[1] for (_, _, function), stat in pstats.Stats(stats_path).stats.items()}
+            with open(report_path) as file:
+                report = file.read()
+
+        # build_catalog ran in the main thread and in the worker
+        self.assertEqual(calls['build_catalog'], 2)
+        self.assertIn('Memory after get_dashboard_details from', report)
+        self.assertIn('Functions by cumulative time', report)
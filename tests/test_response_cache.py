@@ -0,0 +1,68 @@
+import mock
+import tempfile
+import unittest
+
+from response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_listing_is_loaded_once(self):
+        cache = ResponseCache()
+        load = mock.Mock(return_value=iter([{'id': 1}, {'id': 2}]))
+
+        self.assertEqual(list(cache.records(('url', 'folders'), load)), [{'id': 1}, {'id': 2}])
+        self.assertEqual(list(cache.records(('url', 'folders'), load)), [{'id': 1}, {'id': 2}])
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_cached_records_are_copies_with_shared_nested_records(self):
+        cache = ResponseCache()
+        folder = {'id': '1', 'name': 'Shared'}
+        list(cache.records(('url', 'looks'), lambda: iter([{'id': 1, 'folder': folder}, {'id': 2, 'folder': folder}])))
+
+        first, second = cache.records(('url', 'looks'), mock.Mock())
+        first['deleted'] = True
+
+        self.assertEqual(first['folder'], folder)
+        self.assertNotIn('deleted', next(cache.records(('url', 'looks'), mock.Mock())))
+        self.assertIs(cache._records[('url', 'looks')][0][2], cache._records[('url', 'looks')][1][2])
+
+    def test_partially_read_listing_is_not_cached(self):
+        cache = ResponseCache()
+        load = mock.Mock(side_effect=lambda: iter([{'id': 1}, {'id': 2}]))
+
+        records = cache.records(('url', 'looks'), load)
+        next(records)
+        records.close()
+
+        self.assertEqual(len(list(cache.records(('url', 'looks'), load))), 2)
+        self.assertEqual(load.call_count, 2)
+
+    def test_single_use_listing_is_not_kept_in_memory(self):
+        with tempfile.TemporaryDirectory() as cache_path:
+            cache = ResponseCache(cache_path, ttl=60)
+            load = mock.Mock(side_effect=lambda: iter([{'id': 1}, {'id': 2}]))
+
+            self.assertEqual(list(cache.records(('url', 'dashboards'), load, keep=False)), [{'id': 1}, {'id': 2}])
+            self.assertEqual(cache._records, {})
+
+            # stored on disk for the following runs
+            self.assertEqual(list(cache.records(('url', 'dashboards'), load, keep=False)), [{'id': 1}, {'id': 2}])
+            self.assertEqual(load.call_count, 1)
+
+        cache = ResponseCache()
+        list(cache.records(('url', 'dashboards'), load, keep=False))
+        self.assertEqual((cache._records, load.call_count), ({}, 2))
+
+    def test_listing_is_reused_from_disk_within_ttl(self):
+        with tempfile.TemporaryDirectory() as cache_path:
+            list(ResponseCache(cache_path, ttl=60).records(('url', 'folders'), lambda: iter([{'id': 1}])))
+
+            load = mock.Mock()
+            self.assertEqual(list(ResponseCache(cache_path, ttl=60).records(('url', 'folders'), load)), [{'id': 1}])
+            load.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+import mock
+
+from run_metrics import RunMetrics
+
+
+class TestRunMetrics(unittest.TestCase):
+
+    def test_responses_count_into_innermost_phase(self):
+        metrics = RunMetrics(run_id='1')
+        response = mock.Mock(content=b'12345')
+
+        with metrics.phase('get_folder_details', 'from') as outer:
+            metrics.record_response(response)
+            with metrics.phase('authorize', 'from'):
+                metrics.record_response(response)
+            outer.items = 3
+
+        # responses outside of any phase are not attributed
+        metrics.record_response(response)
+
+        rows = {row['phase']: row for row in metrics.rows()}
+        self.assertEqual(rows['get_folder_details']['requests'], 1)
+        self.assertEqual(rows['get_folder_details']['response_bytes'], 5)
+        self.assertEqual(rows['get_folder_details']['items'], 3)
+        self.assertEqual(rows['authorize']['requests'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'src')
+
+# loaded on the code paths using them only
+LAZY_MODULES = ('requests', 'looker_session', 'looker_deployer', 'export_cache', 'export_index', 'tarfile',
+                'difflib', 'profiler', 'cProfile', 'tracemalloc')
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_entry_point_does_not_load_lazy_modules(self):
+        code = f'import sys, component; print(" ".join(m for m in {LAZY_MODULES!r} if m in sys.modules))'
+        process = subprocess.run([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=SRC_PATH),
+                                 capture_output=True, text=True, check=True)
+
+        self.assertEqual(process.stdout.split(), [])
@@ -0,0 +1,25 @@
+import json
+import os
+import tempfile
+import unittest
+
+from table_writer import TableWriter
+
+
+class TestTableWriter(unittest.TestCase):
+
+    def test_writes_declared_columns_and_manifest(self):
+        with tempfile.TemporaryDirectory() as tables_out_path:
+            with TableWriter(tables_out_path, 'log.csv', ['type', 'value'], incremental=True,
+                             primary_key=['type', 'value']) as writer:
+                writer.writerows([{'type': 'looks', 'value': 'A', 'extra': 1}, {'type': 'looks'}])
+
+            with open(os.path.join(tables_out_path, 'log.csv')) as file:
+                self.assertEqual(file.read().splitlines(), ['type,value', 'looks,A', 'looks,'])
+            with open(os.path.join(tables_out_path, 'log.csv.manifest')) as file:
+                self.assertEqual(json.load(file), {'incremental': True, 'primary_key': ['type', 'value']})
+            self.assertEqual(writer.rows_written, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()